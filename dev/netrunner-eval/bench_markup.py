@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass markup renderer against the old chained regex passes.
+Usage: python bench_markup.py [--repeat N] [--scale N] [--fuzz N]
+
+Every section of every puzzle, plus --fuzz random mixes of dialect snippets,
+is rendered with both implementations and must match byte for byte. Timings are then taken on each answer file and on a long
+synthetic answer made of the whole corpus concatenated --scale times.
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+
+import render_puzzles
+from render_puzzles import PROBLEMS_DIR, parse_markdown_sections, render_markup, render_table
+
+
+# --- Reference implementation: render_section() body before the single-pass engine ---
+
+def legacy_replace_card_refs(text: str) -> str:
+    return re.sub(r'\[\[([^\]]+)\]\]', lambda m: render_puzzles.card_to_img(m.group(1)), text)
+
+
+def legacy_replace_icons(text: str) -> str:
+    text = re.sub(r'\[credit\]', '<span class="icon credit"></span>', text)
+    text = re.sub(r'\[Click\]', '<span class="icon click"></span>', text)
+    text = re.sub(r'\[mu\]', '<span class="icon mu"></span>', text)
+    text = re.sub(r'\[link\]', '<span class="icon link"></span>', text)
+    text = re.sub(r'\[trash\]', '<span class="icon trash"></span>', text)
+    text = re.sub(r'\[recurring-credit\]', '<span class="icon recurring"></span>', text)
+    return text
+
+
+def legacy_parse_markdown_table(text: str) -> str:
+    lines = text.split('\n')
+    result = []
+    in_table = False
+    table_lines = []
+
+    for line in lines:
+        if line.strip().startswith('|') and line.strip().endswith('|'):
+            if not in_table:
+                in_table = True
+                table_lines = []
+            table_lines.append(line)
+        else:
+            if in_table:
+                result.append(render_table(table_lines))
+                in_table = False
+                table_lines = []
+            result.append(line)
+
+    if in_table:
+        result.append(render_table(table_lines))
+
+    return '\n'.join(result)
+
+
+def legacy_render_markup(content: str) -> str:
+    content = legacy_parse_markdown_table(content)
+    content = re.sub(
+        r'```\n?(.*?)\n?```',
+        lambda m: f'<pre>{m.group(1)}</pre>',
+        content,
+        flags=re.DOTALL
+    )
+    content = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', content)
+    content = legacy_replace_card_refs(content)
+    content = legacy_replace_icons(content)
+    content = content.replace('↳', '<span class="subroutine">↳</span>')
+
+    parts = re.split(r'(<table.*?</table>)', content, flags=re.DOTALL)
+    processed_parts = []
+    for part in parts:
+        if part.startswith('<table'):
+            processed_parts.append(part)
+        else:
+            part = re.sub(r'\n\n+', '</p><p>', part)
+            if part.strip():
+                part = f'<p>{part}</p>'
+            processed_parts.append(part)
+    return ''.join(processed_parts)
+
+
+# --- Benchmark ---
+
+# Building blocks for random documents: every construct of the dialect,
+# including tables and fences that abut other markup on the same line
+FUZZ_SNIPPETS = [
+    'word', ' ', '  ', '\n', '\n\n', '\n\n\n', '|', 'text | x |',
+    '**bold**', '**a\n\nb**', '[[Sure Gamble]]', '[[Not A Card]]',
+    '[credit]', '[Click]', '[mu]', '[link]', '[trash]', '[recurring-credit]', '↳',
+    '| a | **b** |\n|---|---|\n| c | [credit] |', '\n| h |\n|--|\n',
+    '```\nx: 1\n\n y\n```', '```inline```',
+]
+
+def corpus_sections() -> list:
+    """All (file, section, text) triples from the puzzle corpus."""
+    found = []
+    for md_file in sorted(PROBLEMS_DIR.glob('*-[qa].md')):
+        for key, value in parse_markdown_sections(md_file.read_text()).items():
+            if not key.startswith('_'):
+                found.append((md_file.name, key, value))
+    return found
+
+
+def best_time(func, text: str, repeat: int) -> float:
+    """Best-of-5 seconds per call."""
+    return min(timeit.repeat(lambda: func(text), number=repeat, repeat=5)) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark render_markup() against the chained regex passes.')
+    parser.add_argument('--repeat', type=int, default=20, help='Calls per timing sample (default: 20)')
+    parser.add_argument('--scale', type=int, default=50,
+                        help='Copies of the corpus in the long synthetic answer (default: 50)')
+    parser.add_argument('--fuzz', type=int, default=5000,
+                        help='Random snippet mixes to check for identical output (default: 5000)')
+    args = parser.parse_args()
+
+    sections = corpus_sections()
+    mismatches = [(name, key) for name, key, text in sections
+                  if render_markup(text) != legacy_render_markup(text)]
+    if mismatches:
+        for name, key in mismatches:
+            print(f"❌ Output differs: {name} / {key}")
+        sys.exit(1)
+    print(f"✓ {len(sections)} sections render byte-identically")
+
+    rng = random.Random(0)
+    for _ in range(args.fuzz):
+        text = ''.join(rng.choices(FUZZ_SNIPPETS, k=rng.randint(0, 12)))
+        if render_markup(text) != legacy_render_markup(text):
+            print(f"❌ Output differs: {text!r}")
+            sys.exit(1)
+    print(f"✓ {args.fuzz} random documents render byte-identically\n")
+
+    cases = [(a_file.name, a_file.read_text()) for a_file in sorted(PROBLEMS_DIR.glob('*-a.md'))]
+    long_answer = '\n\n'.join(text for _, _, text in sections) * args.scale
+    if render_markup(long_answer) != legacy_render_markup(long_answer):
+        print("❌ Output differs on the long synthetic answer")
+        sys.exit(1)
+    cases.append((f"corpus x{args.scale}", long_answer))
+
+    print(f"{'Input':<32} {'KB':>8} {'chained':>11} {'single':>11} {'speedup':>8}")
+    for name, text in cases:
+        repeat = args.repeat if len(text) < 100_000 else 1
+        old = best_time(legacy_render_markup, text, repeat)
+        new = best_time(render_markup, text, repeat)
+        print(f"{name:<32} {len(text) / 1024:>8.1f} {old * 1e3:>9.3f}ms {new * 1e3:>9.3f}ms {old / new:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Load-test render_service.py with a simulated authoring workload.
+Usage: python bench_service.py [--url URL] [--requests N] [--concurrency N] [--edit-ratio F] [--revalidate-ratio F]
+
+Without --url a service is started in-process on a free port. Each client
+thread keeps one keep-alive connection and POSTs /render bodies built from
+the puzzles in problems/:
+
+    edit        a puzzle with a fresh edit appended (--edit-ratio): a cache miss
+    revalidate  a body sent before, with the ETag it got (--revalidate-ratio
+                of the rest): a 304, nothing rendered
+    reload      a body sent before, without an ETag: a cache hit
+
+Prints throughput and latency percentiles per kind, and the service's cache
+counters.
+"""
+
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from common import answer_file_for
+from render_puzzles import PROBLEMS_DIR
+
+
+def load_corpus() -> list:
+    """[(name, question, answer)] for every puzzle in problems/."""
+    corpus = []
+    for q_file in sorted(PROBLEMS_DIR.glob('*-q.md')):
+        a_file = answer_file_for(q_file)
+        corpus.append((q_file.stem, q_file.read_text(), a_file.read_text() if a_file.exists() else ''))
+    return corpus
+
+
+def percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_client(host: str, port: int, corpus: list, requests: int, edit_ratio: float,
+               revalidate_ratio: float, seed: int, results: list):
+    """Send requests POSTs over one connection, appending (kind, status, seconds) to results."""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    sent = []  # [(body, etag)]
+    for i in range(requests):
+        if not sent or rng.random() < edit_ratio:
+            name, question, answer = rng.choice(corpus)
+            question += f"\n\nDraft note {seed}-{i}: reconsider the run on [[Hedge Fund]].\n"
+            body, etag, kind = json.dumps({'question': question, 'answer': answer, 'name': name}), None, 'edit'
+        else:
+            body, etag = rng.choice(sent)
+            kind = 'revalidate' if rng.random() < revalidate_ratio else 'reload'
+        headers = {'Content-Type': 'application/json'}
+        if kind == 'revalidate':
+            headers['If-None-Match'] = etag
+        start = time.perf_counter()
+        conn.request('POST', '/render', body, headers)
+        response = conn.getresponse()
+        response.read()
+        results.append((kind, response.status, time.perf_counter() - start))
+        if kind == 'edit' and response.status == 200:
+            sent.append((body, response.getheader('ETag')))
+    conn.close()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Load-test render_service.py.')
+    parser.add_argument('--url', help='Service to test (default: start one in-process)')
+    parser.add_argument('--requests', type=int, default=2000, help='Total requests (default: 2000)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads (default: 8)')
+    parser.add_argument('--edit-ratio', type=float, default=0.2,
+                        help='Share of requests that are fresh edits (default: 0.2)')
+    parser.add_argument('--revalidate-ratio', type=float, default=0.5,
+                        help='Share of repeat requests sent with If-None-Match (default: 0.5)')
+    parser.add_argument('--seed', type=int, default=1, help='Workload seed (default: 1)')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        from render_service import serve
+        server = serve(port=0, quiet=True)
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    corpus = load_corpus()
+    results = []
+    per_client = -(-args.requests // args.concurrency)
+    clients = [threading.Thread(target=run_client,
+                                args=(host, port, corpus, per_client, args.edit_ratio, args.revalidate_ratio,
+                                      args.seed * 1000 + i, results))
+               for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    wall = time.perf_counter() - start
+
+    print(f"{len(results)} requests in {wall:.2f}s over {args.concurrency} connections: "
+          f"{len(results) / wall:,.0f} req/s ({len(results) / wall * 60:,.0f}/min)")
+    print(f"{'Kind':<12} {'count':>7} {'status':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind in ('edit', 'reload', 'revalidate'):
+        rows = [r for r in results if r[0] == kind]
+        if not rows:
+            continue
+        statuses = ','.join(str(s) for s in sorted({status for _, status, _ in rows}))
+        times = [seconds * 1000 for *_, seconds in rows]
+        print(f"{kind:<12} {len(rows):>7} {statuses:>10} {percentile(times, 50):>8.2f} "
+              f"{percentile(times, 95):>8.2f} {percentile(times, 99):>8.2f}")
+
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    conn.request('GET', '/stats')
+    print(f"Service: {conn.getresponse().read().decode()}")
+    conn.close()
+    if server:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark startup of render_puzzles.py and validate_puzzles.py.
+Usage: python bench_startup.py [--runs N]
+
+Each command runs in a fresh interpreter and the best wall time of --runs is
+reported, next to a bare interpreter as the floor. The card index load is then
+timed in-process from JSON and from its precompiled form, using a scratch copy
+of card_lookup.json so the real precompiled file is left alone.
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+from card_index import CARD_LOOKUP_FILE, compile_card_lookup, load_card_lookup
+
+SCRIPT_DIR = Path(__file__).parent
+
+COMMANDS = [
+    ('python (floor)', ['-c', 'pass']),
+    ('import render_puzzles', ['-c', 'import render_puzzles']),
+    ('import + first card lookup', ['-c', "import render_puzzles; render_puzzles.card_to_img('Sure Gamble')"]),
+    ('render_puzzles.py --help', ['render_puzzles.py', '--help']),
+    ('import validate_puzzles', ['-c', 'import validate_puzzles']),
+    ('validate_puzzles.py --help', ['validate_puzzles.py', '--help']),
+]
+
+
+def best_run(args: list, runs: int) -> float:
+    """Best-of-runs wall seconds for a fresh interpreter running args."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=SCRIPT_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def best_load(path: Path, number: int = 50) -> float:
+    """Best-of-5 seconds for an uncached load_card_lookup(path)."""
+    def load():
+        load_card_lookup.cache_clear()
+        load_card_lookup(path)
+    return min(timeit.repeat(load, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark script startup and card index loading.')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters per command (default: 10)')
+    args = parser.parse_args()
+
+    print(f"{'Command':<32} {'best':>9}")
+    for name, cmd in COMMANDS:
+        print(f"{name:<32} {best_run(cmd, args.runs) * 1e3:>7.1f}ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = Path(tmp) / CARD_LOOKUP_FILE.name
+        shutil.copy2(CARD_LOOKUP_FILE, scratch)
+        from_json = best_load(scratch)
+        compile_card_lookup(scratch)
+        from_compiled = best_load(scratch)
+
+    print(f"\nCard index ({len(load_card_lookup())} cards, {CARD_LOOKUP_FILE.stat().st_size / 1024:.1f} KB JSON)")
+    print(f"{'from JSON':<32} {from_json * 1e3:>7.3f}ms")
+    print(f"{'from precompiled':<32} {from_compiled * 1e3:>7.3f}ms  ({from_json / from_compiled:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark the render and validate hot paths on a synthetic corpus.
+Usage: python bench_suite.py [--count N] [--seed N] [--repeat N] [--min-time SECONDS] [--save-baseline] [--tolerance PCT]
+
+A corpus of --count puzzle pairs is generated by synth_corpus.py into a temp
+directory. Each hot function is timed over the whole corpus, as is an
+end-to-end render (pages + index written to disk) and an end-to-end validate.
+Parsed-puzzle caching is bypassed throughout, so every run does the full work.
+Each stage gets a warm-up call, then --repeat samples of enough calls to take
+--min-time each, with the garbage collector paused as in timeit; the best
+per-call time is kept.
+
+Results are compared with bench_baseline.json when it was recorded for the
+same --count and --seed; anything more than --tolerance percent slower is
+reported as a regression and the exit status is 1. A stage over the
+tolerance is timed again up to RETRIES times and keeps its best time, so a
+noisy moment on a shared machine does not fail the run but a real slowdown
+still does. --save-baseline records
+the current run as the new baseline; timings are machine-specific, so record
+it on the machine that runs the comparison.
+"""
+
+import gc
+import json
+import math
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from board_model import parse_board
+from card_index import CARD_LOOKUP_FILE
+from common import answer_file_for
+from render_puzzles import (parse_board_yaml, parse_markdown_sections, render_board,
+                            render_index, render_puzzle, render_section)
+from synth_corpus import generate_corpus
+from validate_puzzles import check_file, load_card_names, validate_puzzle
+
+BASELINE_FILE = Path(__file__).parent / "bench_baseline.json"
+
+# Extra measurements of a stage that looks slower than the baseline
+RETRIES = 3
+
+
+def best_of(func, repeat: int, min_time: float) -> float:
+    """Best wall seconds per call of func(), over repeat samples of at least min_time each."""
+    start = time.perf_counter()
+    func()  # Warm-up: lru_caches, compiled regexes, the OS file cache
+    loops = max(1, math.ceil(min_time / max(time.perf_counter() - start, 1e-9)))
+    best = float('inf')
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            best = min(best, (time.perf_counter() - start) / loops)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def benchmarks(q_files: list, out_dir: Path) -> list:
+    """(name, items, func) for every timed stage; func processes the whole corpus once."""
+    a_files = [answer_file_for(q_file) for q_file in q_files]
+    texts = [f.read_text() for f in q_files + a_files]
+    sections = [(key, value) for text in texts
+                for key, value in parse_markdown_sections(text).items() if not key.startswith('_')]
+    board_sections = [parse_markdown_sections(f.read_text()).get('Board State', '') for f in q_files]
+    board_data = [data for data in map(parse_board_yaml, board_sections) if data]
+    boards = [parse_board(data) for data in board_data]
+    valid_cards = load_card_names(CARD_LOOKUP_FILE)
+
+    def render_all():
+        puzzles = []
+        for q_file in q_files:
+            name = q_file.stem.replace('-q', '')
+            (out_dir / f"{name}.html").write_text(render_puzzle(q_file, cache_dir=None))
+            side = 'Corp' if 'corp' in name else 'Runner'
+            puzzles.append({'name': name, 'filename': f"{name}.html", 'difficulty': 'Unknown', 'side': side})
+        (out_dir / 'index.html').write_text(render_index(puzzles))
+
+    return [
+        ('parse_markdown_sections', len(texts), lambda: [parse_markdown_sections(t) for t in texts]),
+        ('parse_board_yaml', len(board_sections), lambda: [parse_board_yaml(s) for s in board_sections]),
+        ('parse_board', len(board_data), lambda: [parse_board(d) for d in board_data]),
+        ('render_board', len(boards), lambda: [render_board(b) for b in boards]),
+        ('render_section', len(sections), lambda: [render_section(k, v) for k, v in sections]),
+        ('render_puzzle', len(q_files), lambda: [render_puzzle(q, cache_dir=None) for q in q_files]),
+        ('validate_puzzle', len(q_files), lambda: [validate_puzzle(q, valid_cards, cache_dir=None) for q in q_files]),
+        ('end-to-end render', len(q_files), render_all),
+        ('end-to-end validate', len(q_files),
+         lambda: [check_file(q, CARD_LOOKUP_FILE, None) for q in q_files]),
+    ]
+
+
+def load_baseline(count: int, seed: int) -> dict:
+    """Baseline seconds per stage, or {} if none was recorded for this corpus."""
+    try:
+        baseline = json.loads(BASELINE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+    if baseline.get('count') != count or baseline.get('seed') != seed:
+        return {}
+    return baseline.get('results', {})
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark render and validate hot paths on a synthetic corpus.')
+    parser.add_argument('--count', type=int, default=200, help='Synthetic puzzle pairs (default: 200)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--repeat', type=int, default=7, help='Samples per stage, best is kept (default: 7)')
+    parser.add_argument('--min-time', type=float, default=0.2, metavar='SECONDS',
+                        help='Shortest sample; quick stages are called repeatedly to fill it (default: 0.2)')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Record results in {BASELINE_FILE.name}')
+    parser.add_argument('--tolerance', type=float, default=20,
+                        help='Percent slowdown against the baseline counted as a regression (default: 20)')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.count, args.seed)
+    results = {}
+    regressions = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        q_files = generate_corpus(Path(tmp) / "problems", args.count, args.seed)
+        out_dir = Path(tmp) / "html"
+        out_dir.mkdir()
+        print(f"Corpus: {args.count} puzzle pairs (seed {args.seed})\n")
+        print(f"{'Stage':<24} {'items':>6} {'total':>10} {'per item':>10} {'baseline':>10} {'change':>8}")
+
+        for name, items, func in benchmarks(q_files, out_dir):
+            seconds = best_of(func, args.repeat, args.min_time)
+            for _ in range(RETRIES if name in baseline else 0):
+                if seconds <= baseline[name] * (1 + args.tolerance / 100):
+                    break
+                seconds = min(seconds, best_of(func, args.repeat, args.min_time))
+            results[name] = seconds
+            line = f"{name:<24} {items:>6} {seconds * 1e3:>8.1f}ms {seconds / max(items, 1) * 1e6:>8.1f}us"
+            if name in baseline:
+                change = (seconds / baseline[name] - 1) * 100
+                line += f" {baseline[name] * 1e3:>8.1f}ms {change:>+7.1f}%"
+                if change > args.tolerance:
+                    regressions.append(name)
+                    line += "  ❌"
+            print(line)
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps({
+            'count': args.count,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'results': results,
+        }, indent=2) + '\n')
+        print(f"\nSaved baseline to {BASELINE_FILE}")
+
+    if regressions:
+        print(f"\n❌ Slower than baseline by more than {args.tolerance:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+    elif baseline:
+        print(f"\n✓ Within {args.tolerance:g}% of baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Typed board-state model shared by render_puzzles.py and validate_puzzles.py.
+
+A puzzle's ```yaml board block is normalized once by parse_board() into
+Board / Corp / Runner / Server / Card objects, so the renderer and validator
+walk the same structure instead of each re-checking raw YAML shapes.
+Parsing is lenient: a part of the wrong shape is dropped or left at its
+default, and board_schema.py is what reports it to authors.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterator
+
+CENTRAL_SERVERS = ('HQ', 'R&D', 'Archives')
+REMOTE_PREFIXES = ('Server', 'Remote')
+
+# Facedown cards a grip count may give; board_schema rejects more, the renderer draws no more
+MAX_GRIP_COUNT = 200
+GRIP_COUNT = re.compile(r'\s*(\d+)')  # Leading number of a free-text count, e.g. "3 cards (unknown)"
+
+
+@dataclass(slots=True)
+class Issue:
+    """A validation problem; str() gives the "path: message" form shown to authors."""
+    code: str
+    message: str
+    path: str | None = None  # YAML path, None when the issue is not about one spot
+    severity: str = 'error'
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}" if self.path else self.message
+
+
+@dataclass(slots=True)
+class Card:
+    """A card on the board; path is where it sits in the YAML, e.g. corp.HQ.ice[0]."""
+    name: str
+    path: str
+    rezzed: bool = False
+    faceup: bool = False
+    credits: int | None = None
+    adv: int | None = None
+
+
+@dataclass(slots=True)
+class Server:
+    name: str
+    ice: list[Card] = field(default_factory=list)  # Outermost first
+    root: list[Card] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Grip:
+    count: int
+    cards: list[Card] | None = None  # None when only a facedown count is given
+
+
+@dataclass(slots=True)
+class Rig:
+    cards: list[Card] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Corp:
+    credits: int = 0
+    points: int = 0
+    clicks: int = 3
+    servers: list[Server] = field(default_factory=list)  # Centrals first, then remotes
+
+
+@dataclass(slots=True)
+class Runner:
+    credits: int = 0
+    points: int = 0
+    clicks: int = 4
+    grip: Grip = field(default_factory=lambda: Grip(0))
+    rig: Rig = field(default_factory=Rig)
+
+
+@dataclass(slots=True)
+class Board:
+    corp: Corp
+    runner: Runner
+
+    def cards(self) -> Iterator[Card]:
+        """Every card on the board: server ICE and roots, then grip and rig."""
+        for server in self.corp.servers:
+            yield from server.ice
+            yield from server.root
+        if self.runner.grip.cards:
+            yield from self.runner.grip.cards
+        yield from self.runner.rig.cards
+
+
+def parse_card(item, path: str) -> Card | None:
+    """Normalize a card given as a name or a {card: ..., rezzed: ...} mapping."""
+    if isinstance(item, str):
+        return Card(item, path)
+    if isinstance(item, dict):
+        rezzed = item.get('rezzed', False)
+        name = item.get('card', 'Unknown')
+        return Card(
+            name=name if isinstance(name, str) else 'Unknown',  # board_schema reports other values
+            path=path,
+            rezzed=rezzed,
+            faceup=item.get('faceup', rezzed),  # faceup defaults to rezzed state
+            credits=item.get('credits'),
+            adv=item.get('adv'),
+        )
+    return None
+
+
+def parse_card_list(items, path: str) -> list[Card]:
+    """Normalize a YAML list of cards."""
+    if not isinstance(items, list):
+        return []
+    cards = []
+    for i, item in enumerate(items):
+        card = parse_card(item, f"{path}[{i}]")
+        if card is not None:
+            cards.append(card)
+    return cards
+
+
+def parse_server(name: str, data) -> Server:
+    """Normalize a server; root may be one card or a list (e.g. asset + upgrade)."""
+    path = f"corp.{name}"
+    if not isinstance(data, dict):
+        return Server(name)
+
+    ice = parse_card_list(data['ice'], f"{path}.ice") if data.get('ice') else []
+    root = data.get('root')
+    if not root:
+        root_cards = []
+    elif isinstance(root, list):
+        root_cards = parse_card_list(root, f"{path}.root")
+    else:
+        card = parse_card(root, f"{path}.root")
+        root_cards = [card] if card is not None else []
+    return Server(name, ice, root_cards)
+
+
+def parse_grip(data) -> Grip:
+    """Normalize the grip: a list of cards, or just a count of facedown cards."""
+    if not data:
+        return Grip(0, [])
+    if isinstance(data, int):
+        return Grip(data)
+    if isinstance(data, str):
+        match = GRIP_COUNT.match(data)
+        return Grip(int(match.group(1)) if match else 0)
+    cards = parse_card_list(data, "runner.grip")
+    return Grip(len(cards), cards)
+
+
+def parse_board(data) -> Board:
+    """Normalize a decoded ```yaml board block into a Board."""
+    if not isinstance(data, dict):
+        data = {}
+    corp_data = data.get('corp')
+    if not isinstance(corp_data, dict):
+        corp_data = {}
+
+    # Centrals first in fixed order, then remotes in file order
+    servers = [parse_server(name, corp_data[name])
+               for name in CENTRAL_SERVERS if name in corp_data]
+    servers += [parse_server(key, val) for key, val in corp_data.items()
+                if isinstance(key, str) and key.startswith(REMOTE_PREFIXES)]
+    corp = Corp(
+        credits=corp_data.get('credits', 0),
+        points=corp_data.get('points', 0),
+        clicks=corp_data.get('clicks', 3),
+        servers=servers,
+    )
+
+    runner_data = data.get('runner')
+    if not isinstance(runner_data, dict):
+        runner_data = {}
+
+    grip = parse_grip(runner_data.get('grip', 0))
+
+    rig_data = runner_data.get('rig', [])
+    rig = Rig() if isinstance(rig_data, int) else Rig(parse_card_list(rig_data or [], "runner.rig"))
+
+    runner = Runner(
+        credits=runner_data.get('credits', 0),
+        points=runner_data.get('points', 0),
+        clicks=runner_data.get('clicks', 4),
+        grip=grip,
+        rig=rig,
+    )
+
+    return Board(corp, runner)
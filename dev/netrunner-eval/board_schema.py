@@ -0,0 +1,223 @@
+"""
+Declarative schema for puzzle board YAML, compiled once into a validator.
+
+BOARD_SCHEMA describes every shape a ```yaml board block may take, using
+these node kinds:
+
+    Choice   dispatch on the value's Python type to a node per accepted type
+    Mapping  known keys (some required), keys matched by a predicate
+             (server names), anything else reported as an unknown key
+    ListOf   every item checked against one node
+    AtLeast  a lower bound on a number
+    AtMost   an upper bound on a number, or on the leading number of free text
+    Reject   a type that is always wrong, with its own message
+
+compile_node() turns the schema into nested closures, so check_board() walks
+a board once, doing a dict lookup per value, and reports each problem as an
+Issue with its YAML path (e.g. "corp.Server 1.root.adv"). The issue codes and
+messages for shapes board_model.parse_board() already reported are kept.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable
+
+from board_model import CENTRAL_SERVERS, GRIP_COUNT, MAX_GRIP_COUNT, REMOTE_PREFIXES, Issue
+
+
+@dataclass(frozen=True, slots=True)
+class Choice:
+    """Accept the types in options, each checked by its node (None: accepted as is).
+
+    Any other type is reported as code/message, formatted with the value's
+    type and value. With allow_empty, falsy values (None, 0, '', []) are
+    accepted without looking further, as board_model treats them as absent.
+    """
+    options: dict
+    code: str
+    message: str
+    allow_empty: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class Mapping:
+    """A mapping's keys: fields by name, then patterns as (predicate, node) pairs.
+
+    required maps a key to the (code, message) reported when it is missing or
+    empty. Keys matching neither fields nor patterns are reported as warnings.
+    """
+    fields: dict
+    required: dict = field(default_factory=dict)
+    patterns: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class ListOf:
+    item: object
+
+
+@dataclass(frozen=True, slots=True)
+class AtLeast:
+    minimum: int
+    code: str
+    message: str
+
+
+@dataclass(frozen=True, slots=True)
+class AtMost:
+    """An upper bound on a number; for text, on the count it starts with (board_model.GRIP_COUNT)."""
+    maximum: int
+    code: str
+    message: str
+
+
+@dataclass(frozen=True, slots=True)
+class Reject:
+    """A type that is always an error, with its own code and message."""
+    code: str
+    message: str
+
+
+NON_NEGATIVE = AtLeast(0, 'negative-number', "Expected 0 or more, got {value}")
+COUNT = Choice({int: NON_NEGATIVE}, 'expected-number', "Expected a whole number, got {type} {value!r}")
+FLAG = Choice({bool: None}, 'expected-bool', "Expected true or false, got {type} {value!r}")
+TEXT = Choice({str: None}, 'expected-text', "Expected text, got {type}")
+
+# Without 'card' the card is unidentified, e.g. root: {adv: 2}
+CARD_MAPPING = Mapping({'card': TEXT, 'rezzed': FLAG, 'faceup': FLAG, 'credits': COUNT, 'adv': COUNT})
+CARD_OPTIONS = {str: None, dict: CARD_MAPPING}
+CARD = Choice(CARD_OPTIONS, 'invalid-item', "Invalid item type {type}")
+CARD_LIST = Choice({list: ListOf(CARD)}, 'expected-list', "Expected list, got {type}", allow_empty=True)
+COUNT_NOT_LIST = Reject('count-not-list', "Is a number ({value}), should be a list of card names")
+# Each facedown card is drawn, so a typo like "3000 cards" must not reach the renderer
+GRIP_TEXT = AtMost(MAX_GRIP_COUNT, 'count-too-large', "Grip of {value} cards, expected at most {maximum}")
+
+SERVER = Choice({dict: Mapping({
+    'ice': CARD_LIST,
+    # One card, or a list (e.g. asset + upgrade)
+    'root': Choice({**CARD_OPTIONS, list: ListOf(CARD)}, 'invalid-item', "Invalid item type {type}",
+                   allow_empty=True),
+    'cards': COUNT,
+    'contents': Choice({list: ListOf(CARD), int: NON_NEGATIVE}, 'expected-list', "Expected list or count, got {type}",
+                       allow_empty=True),
+})}, 'expected-mapping', "Expected mapping, got {type}", allow_empty=True)
+
+
+def is_server_name(key) -> bool:
+    return isinstance(key, str) and (key in CENTRAL_SERVERS or key.startswith(REMOTE_PREFIXES))
+
+
+CORP = Choice({dict: Mapping(
+    fields={'credits': COUNT, 'points': COUNT, 'clicks': COUNT, 'bad_publicity': COUNT, 'identity': TEXT},
+    patterns=((is_server_name, SERVER),),
+)}, 'expected-mapping', "Expected mapping, got {type}", allow_empty=True)
+
+RUNNER = Choice({dict: Mapping({
+    'credits': COUNT, 'points': COUNT, 'clicks': COUNT, 'link': COUNT, 'tags': COUNT, 'identity': TEXT,
+    # A list of cards, or a free-text count such as "3 cards (unknown)"
+    'grip': Choice({list: ListOf(CARD), str: GRIP_TEXT, int: COUNT_NOT_LIST},
+                   'expected-list', "Expected list, got {type}", allow_empty=True),
+    'rig': Choice({list: ListOf(CARD), int: COUNT_NOT_LIST}, 'expected-list', "Expected list, got {type}",
+                  allow_empty=True),
+    'heap': CARD_LIST,
+    'notes': TEXT,
+    'stack_notes': TEXT,
+})}, 'expected-mapping', "Expected mapping, got {type}", allow_empty=True)
+
+BOARD_SCHEMA = Choice({dict: Mapping(
+    fields={'corp': CORP, 'runner': RUNNER},
+    required={'corp': ('missing-corp', "Missing 'corp' in YAML"),
+              'runner': ('missing-runner', "Missing 'runner' in YAML")},
+)}, 'expected-mapping', "Board YAML: Expected mapping, got {type}")
+
+
+def _join(path: str, key) -> str:
+    return f"{path}.{key}" if path else str(key)
+
+
+def _accept(value, path: str, issues: list):
+    pass
+
+
+def compile_node(node) -> Callable:
+    """A check(value, path, issues) function for a schema node."""
+    if node is None:
+        return _accept
+
+    if isinstance(node, Choice):
+        checks = {kind: compile_node(option) for kind, option in node.options.items()}
+        code, message, allow_empty = node.code, node.message, node.allow_empty
+
+        def check_choice(value, path, issues):
+            if allow_empty and not value:
+                return
+            check = checks.get(type(value))
+            if check is None:
+                issues.append(Issue(code, message.format(type=type(value).__name__, value=value), path or None))
+            else:
+                check(value, path, issues)
+        return check_choice
+
+    if isinstance(node, Mapping):
+        checks = {key: compile_node(value) for key, value in node.fields.items()}
+        patterns = [(predicate, compile_node(value)) for predicate, value in node.patterns]
+        required = list(node.required.items())
+
+        def check_mapping(value, path, issues):
+            for key, (code, message) in required:
+                if not value.get(key):
+                    issues.append(Issue(code, message, path or None))
+            for key, item in value.items():
+                check = checks.get(key) if isinstance(key, str) else None
+                if check is None:
+                    check = next((check for predicate, check in patterns if predicate(key)), None)
+                if check is None:
+                    issues.append(Issue('unknown-key', f"Unknown key '{key}'", _join(path, key), 'warning'))
+                else:
+                    check(item, _join(path, key), issues)
+        return check_mapping
+
+    if isinstance(node, ListOf):
+        check_item = compile_node(node.item)
+
+        def check_list(value, path, issues):
+            for i, item in enumerate(value):
+                check_item(item, f"{path}[{i}]", issues)
+        return check_list
+
+    if isinstance(node, AtLeast):
+        minimum, code, message = node.minimum, node.code, node.message
+
+        def check_at_least(value, path, issues):
+            if value < minimum:
+                issues.append(Issue(code, message.format(value=value), path or None))
+        return check_at_least
+
+    if isinstance(node, AtMost):
+        maximum, code, message = node.maximum, node.code, node.message
+
+        def check_at_most(value, path, issues):
+            if isinstance(value, str):
+                match = GRIP_COUNT.match(value)
+                if not match:
+                    return
+                value = int(match.group(1))
+            if value > maximum:
+                issues.append(Issue(code, message.format(value=value, maximum=maximum), path or None))
+        return check_at_most
+
+    if isinstance(node, Reject):
+        def check_reject(value, path, issues):
+            issues.append(Issue(node.code, node.message.format(type=type(value).__name__, value=value), path or None))
+        return check_reject
+
+    raise TypeError(f"Unknown schema node {node!r}")
+
+
+_check_board = compile_node(BOARD_SCHEMA)
+
+
+def check_board(data) -> list[Issue]:
+    """Every schema violation in a decoded board block, in YAML order."""
+    issues = []
+    _check_board(data, '', issues)
+    return issues
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Bounded YAML loading for puzzle board blocks.
+Usage: python board_yaml.py FILE...
+
+Board blocks come from contributors, so load_board() decodes them with
+limits that no real board gets near (the largest has about 100 nodes, 5 deep):
+
+    MAX_BOARD_BYTES   size of the block's text, checked before parsing
+    MAX_BOARD_NODES   nodes in the document with every alias expanded
+    MAX_BOARD_ALIASES alias references (*name), including merge keys (<<: *name)
+    MAX_BOARD_DEPTH   nesting of mappings and sequences
+    BOARD_TIME_BUDGET seconds for one block
+
+Scanning and parsing run in libyaml when PyYAML has it. Composing the node
+graph is done by BoundedComposer rather than libyaml's composer, which
+recurses in C and crashes the interpreter on a few thousand nested brackets;
+it keeps each node's expanded size as it goes, so an alias bomb ("billion
+laughs", or doubling merge keys) is rejected before anything is constructed
+or walked by a consumer. The time budget is checked at every node; running
+out raises BoardYAMLTimeout, which says more about the machine's load than
+about the block, so callers must not cache it.
+"""
+
+import time
+
+import yaml
+from yaml.composer import Composer
+from yaml.events import AliasEvent
+from yaml.nodes import MappingNode, SequenceNode
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+MAX_BOARD_BYTES = 64 * 1024
+MAX_BOARD_NODES = 5_000
+MAX_BOARD_ALIASES = 200
+MAX_BOARD_DEPTH = 32
+BOARD_TIME_BUDGET = 0.5
+
+
+class BoardYAMLError(yaml.MarkedYAMLError):
+    """A board block over one of the limits, marked where it was found when known."""
+
+    def __init__(self, problem: str, mark=None):
+        super().__init__(problem=problem, problem_mark=mark)
+
+
+class BoardYAMLTimeout(BoardYAMLError):
+    """A board block that ran past BOARD_TIME_BUDGET; the same block may load next time."""
+
+
+class BoundedComposer(Composer):
+    """Composer enforcing the board limits, recording each node's expanded size."""
+
+    def start_budget(self):
+        self.sizes = {}  # id(node) -> nodes with aliases expanded, once composed
+        self.nodes = 0  # composed so far, so a huge flat list stops early
+        self.aliases = 0
+        self.depth = self.max_depth = 0
+        self.deadline = time.perf_counter() + BOARD_TIME_BUDGET
+
+    def compose_node(self, parent, index):
+        if time.perf_counter() > self.deadline:
+            raise BoardYAMLTimeout(f"took over {BOARD_TIME_BUDGET}s to load")
+        if self.check_event(AliasEvent):
+            event = self.peek_event()
+            self.aliases += 1
+            if self.aliases > MAX_BOARD_ALIASES:
+                raise BoardYAMLError(f"over {MAX_BOARD_ALIASES} aliases", event.start_mark)
+            node = super().compose_node(parent, index)
+            if id(node) not in self.sizes:
+                raise BoardYAMLError(f"recursive alias *{event.anchor}", event.start_mark)
+            return node
+
+        self.nodes += 1
+        if self.nodes > MAX_BOARD_NODES:
+            raise BoardYAMLError(f"over {MAX_BOARD_NODES} nodes", self.peek_event().start_mark)
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        if self.depth > MAX_BOARD_DEPTH:
+            raise BoardYAMLError(f"nested over {MAX_BOARD_DEPTH} levels deep", self.peek_event().start_mark)
+        node = super().compose_node(parent, index)
+        self.depth -= 1
+
+        if isinstance(node, MappingNode):
+            size = 1 + sum(self.sizes[id(key)] + self.sizes[id(value)] for key, value in node.value)
+        elif isinstance(node, SequenceNode):
+            size = 1 + sum(self.sizes[id(item)] for item in node.value)
+        else:
+            size = 1
+        if size > MAX_BOARD_NODES:
+            raise BoardYAMLError(f"over {MAX_BOARD_NODES} nodes with aliases expanded", node.start_mark)
+        self.sizes[id(node)] = size
+        return node
+
+
+class BoundedLoader(BoundedComposer, SafeLoader):
+    """SafeLoader (libyaml's when available) composing through BoundedComposer."""
+
+    def __init__(self, stream):
+        SafeLoader.__init__(self, stream)
+        self.anchors = {}  # libyaml's loader never calls Composer.__init__
+        self.start_budget()
+
+
+def compose_board(text: str) -> tuple[BoundedLoader, yaml.Node | None]:
+    """(loader, root node) for a board block, within the limits above."""
+    if len(text.encode()) > MAX_BOARD_BYTES:
+        raise BoardYAMLError(f"block is over {MAX_BOARD_BYTES} bytes")
+    loader = BoundedLoader(text)
+    try:
+        return loader, loader.get_single_node()
+    except BaseException:
+        loader.dispose()
+        raise
+
+
+def load_board(text: str):
+    """Decode one board block like yaml.safe_load, within the limits above.
+
+    Raises yaml.YAMLError (BoardYAMLError for a broken limit, BoardYAMLTimeout
+    for the time budget).
+    """
+    loader, node = compose_board(text)
+    try:
+        return loader.construct_document(node) if node is not None else None
+    finally:
+        loader.dispose()
+
+
+def main():
+    import argparse
+    from pathlib import Path
+    from puzzle_cache import YAML_BLOCK
+    parser = argparse.ArgumentParser(description='Check that puzzle YAML blocks load within the board limits.')
+    parser.add_argument('files', nargs='+', type=Path)
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.files:
+        for i, match in enumerate(YAML_BLOCK.finditer(path.read_text()), 1):
+            start = time.perf_counter()
+            try:
+                loader, node = compose_board(match.group(1))
+                if node is not None:
+                    loader.construct_document(node)
+                loader.dispose()
+            except yaml.YAMLError as e:
+                print(f"❌ {path.name} block {i}: {e}")
+                failed = True
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            nodes = loader.sizes[id(node)] if node is not None else 0
+            print(f"✓ {path.name} block {i}: {nodes} nodes, {loader.aliases} aliases, "
+                  f"depth {loader.max_depth}, {elapsed:.1f}ms")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
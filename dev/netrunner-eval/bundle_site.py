@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Pack every puzzle into one self-contained HTML file.
+Usage: python bundle_site.py [OUT_FILE] [--images nrdb|localhost]
+
+The bundle carries the puzzle page CSS/JS once, an index of puzzles, and each
+puzzle's rendered page body, gzipped and base64-encoded. Card images are
+stored as card codes rather than URLs, so the repeated image URLs cost
+nothing. Nothing is decoded up front: opening a puzzle (#name in the URL)
+inflates just that puzzle with the browser's DecompressionStream and fills in
+its card images from the image config embedded once.
+
+Bodies are rendered by render_puzzles.py, so the bundle and the per-page site
+always show the same thing.
+"""
+
+import base64
+import gzip
+import json
+import re
+from pathlib import Path
+
+from common import write_atomic
+from puzzle_cache import CACHE_DIR
+from render_puzzles import (HTML_DIR, HTML_TEMPLATE, IMAGE_CONTEXTS, IMAGE_SOURCES, PROBLEMS_DIR, RenderContext,
+                            collect, emit_puzzle, link_assets, puzzle_metadata)
+
+BUNDLE_FILE = HTML_DIR / "bundle.html"
+
+# A puzzle page's <body> content; the back link returns to the bundle's index
+FRAGMENT_TEMPLATE = re.search(r'<body>\n(.*?)\n    <script>', HTML_TEMPLATE, re.DOTALL).group(1).replace(
+    'href="index.html"', 'href="#"')
+
+BUNDLE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Netrunner Puzzles</title>
+    <style>
+{style}
+        .puzzle-index table {{
+            width: 100%;
+            border-collapse: collapse;
+        }}
+
+        .puzzle-index th, .puzzle-index td {{
+            text-align: left;
+            padding: 12px 15px;
+            border-bottom: 1px solid var(--border-color);
+        }}
+
+        .puzzle-index th {{
+            color: var(--text-secondary);
+            font-weight: 600;
+        }}
+
+        .puzzle-index a {{
+            color: #6eb5ff;
+            text-decoration: none;
+        }}
+    </style>
+</head>
+<body>
+    <div class="puzzle-container puzzle-index" id="index">
+        <h1>Netrunner Puzzles</h1>
+        <table>
+            <thead>
+                <tr>
+                    <th>Puzzle</th>
+                    <th>Difficulty</th>
+                    <th>Side</th>
+                </tr>
+            </thead>
+            <tbody>
+                {rows}
+            </tbody>
+        </table>
+    </div>
+    <div id="puzzle" hidden></div>
+
+    <script type="application/json" id="puzzle-data">{data}</script>
+    <script>
+{script}
+        const DATA = JSON.parse(document.getElementById('puzzle-data').textContent);
+
+        // Same choice of src/srcset as card_img_attrs() in render_puzzles.py
+        function showCardImage(img) {{
+            const [width, height, zoom] = DATA.contexts[img.dataset.ctx];
+            const shown = Math.round(width * zoom);
+            const sizes = Object.entries(DATA.images.sizes);
+            const url = size => `${{DATA.images.base}}/${{size}}/${{img.dataset.card}}${{DATA.images.ext}}`;
+            const fallback = (sizes.find(([, w]) => w >= shown) || sizes[sizes.length - 1])[0];
+            img.sizes = `${{shown}}px`;
+            img.srcset = sizes.map(([size, w]) => `${{url(size)}} ${{w}}w`).join(', ');
+            img.src = url(fallback);
+        }}
+
+        async function inflate(base64) {{
+            const bytes = Uint8Array.from(atob(base64), c => c.charCodeAt(0));
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            return new Response(stream).text();
+        }}
+
+        async function showPuzzle() {{
+            const name = decodeURIComponent(location.hash.slice(1));
+            const open = Object.hasOwn(DATA.puzzles, name);
+            const view = document.getElementById('puzzle');
+            view.innerHTML = open ? await inflate(DATA.puzzles[name]) : '';
+            view.querySelectorAll('img[data-card]').forEach(showCardImage);
+            view.hidden = !open;
+            document.getElementById('index').hidden = open;
+            document.title = open ? `${{view.querySelector('h1').textContent}} - Netrunner Puzzle` : 'Netrunner Puzzles';
+            window.scrollTo(0, 0);
+        }}
+
+        window.addEventListener('hashchange', showPuzzle);
+        showPuzzle();
+    </script>
+</body>
+</html>
+'''
+
+
+def pack(html: str) -> str:
+    """gzip + base64, as inflate() in the bundle expects."""
+    return base64.b64encode(gzip.compress(html.encode(), mtime=0)).decode('ascii')
+
+
+def render_bundle(image_source: str) -> tuple[str, dict]:
+    """The bundle HTML, and {puzzle name: packed body} for what went into it."""
+    ctx = RenderContext(image_source=image_source, deferred_images=True)
+
+    rows = []
+    puzzles = {}
+    for q_file in sorted(PROBLEMS_DIR.glob('*-q.md')):
+        p = puzzle_metadata(q_file)
+        puzzles[p['name']] = pack(collect(emit_puzzle, q_file, CACHE_DIR, FRAGMENT_TEMPLATE, ctx))
+        rows.append(f'''
+                <tr>
+                    <td><a href="#{p['name']}">{p['name']}</a></td>
+                    <td><span class="difficulty {p['difficulty'].lower()}">{p['difficulty']}</span></td>
+                    <td>{p['side']}</td>
+                </tr>''')
+
+    assets = link_assets(HTML_TEMPLATE, 'puzzle')[1]
+    style = next(text for path, text in assets.items() if path.endswith('.css'))
+    script = next(text for path, text in assets.items() if path.endswith('.js'))
+    data = {
+        'images': IMAGE_SOURCES[image_source],
+        'contexts': IMAGE_CONTEXTS,
+        'puzzles': puzzles,
+    }
+    html = BUNDLE_TEMPLATE.format(
+        style=style.rstrip('\n'),
+        script=script.rstrip('\n'),
+        rows=''.join(rows),
+        # Keep "</script>" from closing the data block early
+        data=json.dumps(data, separators=(',', ':')).replace('</', '<\\/'),
+    )
+    return html, puzzles
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Pack every puzzle into one self-contained HTML file.')
+    parser.add_argument('out_file', nargs='?', type=Path, default=BUNDLE_FILE,
+                        help='Bundle to write (default: html/bundle.html)')
+    parser.add_argument('--images', choices=['nrdb', 'localhost'], default='nrdb',
+                        help='Image source: nrdb (NetrunnerDB CDN) or localhost (local Jinteki)')
+    args = parser.parse_args()
+
+    html, puzzles = render_bundle(args.images)
+    args.out_file.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(args.out_file, html)
+    print(f"Wrote {args.out_file}: {len(puzzles)} puzzles, {len(html.encode()) / 1024:.1f} KB "
+          f"({sum(map(len, puzzles.values())) / 1024:.1f} KB of packed puzzles)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Indexed local card database built from the NetrunnerDB card dump.
+Usage: python card_db.py build [--dump FILE] | lookup | card-text (--all | FILE...) [--preview] | search QUERY
+
+The dump fetch-cards downloads (.card-cache.json, NRDB's /api/2.0/public/cards)
+is loaded once into an SQLite file (.card-db.sqlite) with a case-insensitive
+title index and a full-text index over card titles and text. The database is
+rebuilt whenever the dump's size or mtime changes, so it never goes stale.
+
+    lookup      regenerate card_lookup.json: every title -> its latest printing's code
+    card-text   regenerate the "## Card Text (Auto-Generated)" section of each
+                file from its [[Card Name]] references, in one pass over the corpus
+    search      full-text search of card titles and text
+
+Card text comes out exactly as fetch-cards' jq pipeline formatted it: a card
+is matched on its title ignoring ASCII case, first printing in the dump.
+"""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+from card_index import CARD_LOOKUP_FILE
+from common import CARD_REF, atomic_path, write_atomic
+
+SCRIPT_DIR = Path(__file__).parent
+PROBLEMS_DIR = SCRIPT_DIR / "problems"
+DUMP_FILE = SCRIPT_DIR / ".card-cache.json"
+DB_FILE = SCRIPT_DIR / ".card-db.sqlite"
+
+# Bump when the schema changes, so existing databases are rebuilt
+SCHEMA_VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE cards (
+    code TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    position INTEGER NOT NULL,  -- Order in the dump
+    type_code TEXT,
+    text TEXT,
+    data TEXT NOT NULL  -- The card's full JSON
+);
+CREATE INDEX cards_title ON cards (title COLLATE NOCASE, position);
+CREATE VIRTUAL TABLE card_fts USING fts5(title, text, content='cards');
+'''
+
+CARD_TEXT_HEADER = '## Card Text (Auto-Generated)'
+
+# NRDB markup -> plain text, as fetch-cards' sed pipeline rewrote it
+TEXT_REPLACEMENTS = [
+    ('<strong>', ''), ('</strong>', ''), ('<em>', ''), ('</em>', ''), ('&ndash;', '–'),
+    ('<trace>', 'Trace '), ('</trace>', ''), ('[subroutine]', '↳'),
+]
+
+# Types whose type line is "Type" or "Type: keywords"
+KEYWORD_TYPES = ('resource', 'event', 'operation', 'agenda', 'asset', 'hardware', 'upgrade')
+
+
+def _stamp(path: Path) -> str:
+    st = path.stat()
+    return f"{SCHEMA_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def build_db(dump: Path = DUMP_FILE, db: Path = DB_FILE) -> int:
+    """(Re)build db from an NRDB card dump, return how many cards it holds."""
+    stamp = _stamp(dump)
+    with open(dump) as f:
+        cards = json.load(f)['data']
+
+    with atomic_path(db) as tmp:
+        tmp.unlink(missing_ok=True)
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                'INSERT OR REPLACE INTO cards (code, title, position, type_code, text, data) VALUES (?, ?, ?, ?, ?, ?)',
+                ((card['code'], card['title'], i, card.get('type_code'), card.get('text') or '', json.dumps(card))
+                 for i, card in enumerate(cards)))
+            conn.execute('INSERT INTO card_fts (rowid, title, text) SELECT rowid, title, text FROM cards')
+            conn.execute("INSERT INTO meta VALUES ('dump_stamp', ?)", (stamp,))
+            conn.commit()
+        finally:
+            conn.close()
+    return len(cards)
+
+
+def open_db(dump: Path = DUMP_FILE, db: Path = DB_FILE) -> sqlite3.Connection:
+    """Connect to db, rebuilding it first if the dump changed since it was built.
+
+    Without a dump an existing database is used as it is.
+    """
+    current = None
+    if db.exists():
+        conn = sqlite3.connect(db)
+        try:
+            current = conn.execute("SELECT value FROM meta WHERE key = 'dump_stamp'").fetchone()[0]
+        except (sqlite3.Error, TypeError):
+            pass
+        finally:
+            conn.close()
+    if dump.exists():
+        if current != _stamp(dump):
+            build_db(dump, db)
+    elif current is None:
+        raise FileNotFoundError(f"No card dump at {dump}; run ./fetch-cards --all or pass --dump")
+    return sqlite3.connect(db)
+
+
+def find_card(conn: sqlite3.Connection, name: str) -> dict | None:
+    """The first printing titled name, ignoring ASCII case (like fetch-cards' jq match)."""
+    row = conn.execute('SELECT data FROM cards WHERE title = ? COLLATE NOCASE ORDER BY position LIMIT 1',
+                       (name,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def card_lookup(conn: sqlite3.Connection) -> dict:
+    """{title: code of its latest printing}, as in card_lookup.json."""
+    return dict(conn.execute('SELECT title, MAX(code) FROM cards GROUP BY title'))
+
+
+def search(conn: sqlite3.Connection, query: str, limit: int = 20) -> list:
+    """Titles of the cards whose title or text best match an FTS5 query, best first."""
+    rows = conn.execute('SELECT cards.title FROM card_fts JOIN cards ON cards.rowid = card_fts.rowid '
+                        'WHERE card_fts MATCH ? ORDER BY rank LIMIT ?', (query, limit))
+    return [title for title, in rows]
+
+
+def _value(card: dict, key: str, default: str = '?') -> str:
+    """A stat as jq's `.key // default` printed it: null and false take the default."""
+    value = card.get(key)
+    return default if value is None or value is False else str(value)
+
+
+def type_line(card: dict) -> str:
+    card_type = card.get('type_code') or ''
+    keywords = card.get('keywords') or ''
+    if card_type == 'ice':
+        return f"ICE: {keywords}"
+    if card_type == 'program':
+        if 'Icebreaker' in keywords:
+            return f"Icebreaker: {keywords.replace('Icebreaker - ', '', 1)}"
+        return f"Program: {keywords}"
+    if card_type in KEYWORD_TYPES:
+        return f"{card_type.capitalize()}: {keywords}" if keywords else card_type.capitalize()
+    if card_type == 'identity':
+        return 'Identity'
+    return card_type
+
+
+def stats_line(card: dict) -> str:
+    card_type = card.get('type_code')
+    if card_type == 'ice':
+        return f"Rez {_value(card, 'cost')}, Strength {_value(card, 'strength')}"
+    if card_type == 'program':
+        strength = _value(card, 'strength', '')
+        mu = _value(card, 'memory_cost', '1')
+        if strength:
+            return f"Install {_value(card, 'cost')}, Strength {strength}, {mu} MU"
+        return f"Install {_value(card, 'cost')}, {mu} MU"
+    if card_type in ('resource', 'hardware', 'event', 'operation'):
+        return f"Cost {_value(card, 'cost')}"
+    if card_type == 'agenda':
+        return f"Adv {_value(card, 'advancement_cost')}, Points {_value(card, 'agenda_points')}"
+    if card_type in ('asset', 'upgrade'):
+        return f"Rez {_value(card, 'cost')}, Trash {_value(card, 'trash_cost')}"
+    return ''
+
+
+def format_card(card: dict) -> str:
+    """A card's entry in a Card Text section: a header line, its text, a blank line."""
+    text = card.get('text') or ''
+    for old, new in TEXT_REPLACEMENTS:
+        text = text.replace(old, new)
+    return f"**{card['title']}** - {type_line(card)} ({stats_line(card)})\n{text}\n\n"
+
+
+def card_refs(content: str) -> list:
+    """Unique [[Card Name]] references, in the order fetch-cards listed them (ignoring case)."""
+    return sorted(set(CARD_REF.findall(content)), key=lambda name: (name.casefold(), name))
+
+
+def card_text_section(names: list, cards: dict) -> str:
+    """The Card Text section for names; cards maps each name to find_card()'s result."""
+    entries = [format_card(cards[name]) if cards[name] else f"**{name}** - *Card not found*\n\n"
+               for name in names]
+    return f"{CARD_TEXT_HEADER}\n\n{''.join(entries)}".rstrip('\n')
+
+
+def replace_card_text(content: str, section: str) -> str:
+    """content with its Card Text section replaced by section, or section added.
+
+    The section goes right before the first "## Question" heading, or at the
+    end when there is none.
+    """
+    kept = []
+    in_section = had_section = False
+    for line in content.splitlines():
+        if line.startswith('## Card Text'):
+            in_section = had_section = True
+            continue
+        if in_section and line.startswith('##'):
+            in_section = False
+        if not in_section:
+            kept.append(line)
+
+    block = f"{section}\n" if had_section else f"\n{section}\n"
+    for i, line in enumerate(kept):
+        if line.startswith('## Question'):
+            kept.insert(i, block)
+            break
+    else:
+        kept.append(section)
+    return '\n'.join(kept) + '\n'
+
+
+def update_card_text(conn: sqlite3.Connection, files: list, preview: bool = False) -> tuple[list, dict]:
+    """Regenerate the Card Text section of each file with [[Card Name]] references.
+
+    Each referenced name is looked up once for the whole batch. Returns the
+    files rewritten, and {file: [names not in the database]}. With preview
+    the sections are printed instead of written.
+    """
+    refs = {path: card_refs(path.read_text()) for path in files}
+    names = set().union(*refs.values())
+    cards = {name: find_card(conn, name) for name in names}
+
+    updated = []
+    missing = {}
+    for path, file_refs in refs.items():
+        if not file_refs:
+            continue
+        missing_here = [name for name in file_refs if cards[name] is None]
+        if missing_here:
+            missing[path] = missing_here
+        section = card_text_section(file_refs, cards)
+        if preview:
+            print(f"{section}\n")
+            continue
+        content = path.read_text()
+        new_content = replace_card_text(content, section)
+        if new_content != content:
+            write_atomic(path, new_content)
+            updated.append(path)
+    return updated, missing
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Build and query the indexed local card database.')
+    parser.add_argument('--dump', type=Path, default=DUMP_FILE,
+                        help=f'NRDB card dump (default: {DUMP_FILE.name}, as fetched by fetch-cards)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help='Rebuild the database from the dump')
+    commands.add_parser('lookup', help=f'Regenerate {CARD_LOOKUP_FILE.name}')
+    text_parser = commands.add_parser('card-text', help='Regenerate Card Text sections from [[Card Name]] refs')
+    text_parser.add_argument('files', nargs='*', type=Path, help='Puzzle files to update')
+    text_parser.add_argument('--all', action='store_true', help='Every -q.md file in problems/')
+    text_parser.add_argument('--preview', action='store_true', help='Print the sections instead of writing them')
+    search_parser = commands.add_parser('search', help='Full-text search of card titles and text')
+    search_parser.add_argument('query', help='FTS5 query, e.g. "net damage" or "title:karun*"')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print(f"Built {DB_FILE.name}: {build_db(args.dump)} cards from {args.dump}")
+        return
+    try:
+        conn = open_db(args.dump)
+    except FileNotFoundError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'lookup':
+        lookup = card_lookup(conn)
+        text = json.dumps(lookup, indent=2, sort_keys=True)
+        if CARD_LOOKUP_FILE.exists() and CARD_LOOKUP_FILE.read_text() == text:
+            print(f"✓ {CARD_LOOKUP_FILE.name} up to date ({len(lookup)} cards)")
+        else:
+            write_atomic(CARD_LOOKUP_FILE, text)
+            print(f"✓ Wrote {CARD_LOOKUP_FILE.name} ({len(lookup)} cards)")
+    elif args.command == 'card-text':
+        files = sorted(PROBLEMS_DIR.glob('*-q.md')) if args.all else args.files
+        for path in files:
+            if not path.is_file():
+                print(f"File not found: {path}", file=sys.stderr)
+        files = [path for path in files if path.is_file()]
+        updated, missing = update_card_text(conn, files, args.preview)
+        for path, names in missing.items():
+            for name in names:
+                print(f"**{name}** - NOT FOUND IN DATABASE ({path.name})", file=sys.stderr)
+        if not args.preview:
+            for path in updated:
+                print(f"Updated: {path}")
+            print(f"✓ {len(updated)} of {len(files)} files updated")
+    else:
+        try:
+            for title in search(conn, args.query):
+                print(title)
+        except sqlite3.OperationalError as e:
+            print(f"❌ Bad search query: {e}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Card -> puzzle dependency index shared by render_puzzles.py and validate_puzzles.py.
+Usage: python card_deps.py uses CARD... | changed OLD_LOOKUP [NEW_LOOKUP] | status
+
+A puzzle depends on every card it draws on a YAML board, references as
+[[Card]] in its question or answer, or lists in its Card Text appendix.
+.card-deps.json records those cards per puzzle file (refreshed only for files
+whose content changed) and the reverse map from each card to its puzzles.
+
+Render and validate key their caches on cards_digest(): the lookup entries
+of just the cards a puzzle uses, rather than all of card_lookup.json. A
+lookup change then re-renders and re-validates only the puzzles using the
+changed cards. `changed` lists those puzzles for two versions of the lookup,
+e.g. `git show HEAD:card_lookup.json > old.json`.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from board_model import parse_board
+from card_index import CARD_LOOKUP_FILE, fold, load_card_lookup
+from common import CARD_REF, answer_file_for, write_atomic
+from puzzle_cache import CACHE_DIR, is_transient, load_puzzle
+
+SCRIPT_DIR = Path(__file__).parent
+PROBLEMS_DIR = SCRIPT_DIR / "problems"
+DEPS_FILE = SCRIPT_DIR / ".card-deps.json"
+
+# Bump when puzzle_cards() changes, so every entry is refreshed
+DEPS_VERSION = 1
+
+CARD_TEXT_ENTRY = re.compile(r'^\*\*(.+?)\*\* - ', re.MULTILINE)
+
+
+def source_digest(q_file: Path) -> str:
+    """SHA-256 over a puzzle's question and answer files."""
+    digest = hashlib.sha256(q_file.read_bytes())
+    a_file = answer_file_for(q_file)
+    digest.update(b'\0' + (a_file.read_bytes() if a_file.exists() else b''))
+    return digest.hexdigest()
+
+
+def puzzle_cards(q_puzzle: dict, a_content: str) -> list:
+    """Sorted names of every card a parsed question (see puzzle_cache) and its answer use."""
+    sections = q_puzzle['sections']
+    names = set(CARD_REF.findall('\n'.join(sections.values())))
+    names.update(CARD_REF.findall(a_content))
+    for key, value in sections.items():
+        if key.startswith('Card Text'):
+            names.update(CARD_TEXT_ENTRY.findall(value))
+    for data, error in q_puzzle['yaml'].values():
+        if error is None and isinstance(data, dict):
+            names.update(card.name for card in parse_board(data).cards() if card.name)
+    return sorted(names)
+
+
+def load_deps(q_files: list, cache_dir: Path | None = CACHE_DIR) -> dict:
+    """{q file path: sorted card names} for q_files, refreshing .card-deps.json as needed.
+
+    Entries for files that no longer exist are dropped.
+    """
+    try:
+        saved = json.loads(DEPS_FILE.read_text())
+        entries = saved['puzzles'] if saved.get('version') == DEPS_VERSION else {}
+    except (OSError, ValueError, KeyError, TypeError):
+        entries = {}
+
+    changed = False
+    for q_file in q_files:
+        key = str(q_file.resolve())
+        digest = source_digest(q_file)
+        entry = entries.get(key)
+        if entry and entry.get('digest') == digest:
+            continue
+        a_file = answer_file_for(q_file)
+        puzzle = load_puzzle(q_file, cache_dir)
+        cards = puzzle_cards(puzzle, a_file.read_text() if a_file.exists() else '')
+        # A board that timed out is missing its cards; look again next time
+        entries[key] = {'digest': None if is_transient(puzzle) else digest, 'cards': cards}
+        changed = True
+    for key in [key for key in entries if not Path(key).exists()]:
+        del entries[key]
+        changed = True
+
+    if changed:
+        deps = {'version': DEPS_VERSION, 'puzzles': entries, 'cards': reverse_index(entries)}
+        write_atomic(DEPS_FILE, json.dumps(deps, indent=2, sort_keys=True))
+    return {str(q_file.resolve()): entries[str(q_file.resolve())]['cards'] for q_file in q_files}
+
+
+def reverse_index(entries: dict) -> dict:
+    """{card name: sorted q file paths using it} from {path: {'cards': [...]}}."""
+    puzzles = {}
+    for path, entry in sorted(entries.items()):
+        for name in entry['cards']:
+            puzzles.setdefault(name, []).append(path)
+    return puzzles
+
+
+def lookup_names_digest(lookup: dict) -> str:
+    """Hash of the set of card names in a lookup."""
+    return hashlib.sha256('\n'.join(sorted(lookup)).encode()).hexdigest()
+
+
+def cards_digest(names: list, lookup: dict, names_digest: str | None = None) -> str:
+    """Hash of the lookup entries for names, standing in for the whole lookup in cache keys.
+
+    For the validator a puzzle using a card the lookup lacks also depends on
+    every other name (an unknown card's "did you mean" suggestions can
+    change); pass names_digest (lookup_names_digest(lookup)) to mix it in then.
+    """
+    entries = [[name, lookup.get(name)] for name in names]
+    if names_digest and any(code is None for _, code in entries):
+        entries.append(['*', names_digest])
+    return hashlib.sha256(json.dumps(entries).encode()).hexdigest()
+
+
+def changed_cards(old_lookup: dict, new_lookup: dict) -> set:
+    """Names added, removed or given a new code between two lookups."""
+    return {name for name in old_lookup.keys() | new_lookup.keys() if old_lookup.get(name) != new_lookup.get(name)}
+
+
+def affected_puzzles(deps: dict, names: set) -> list:
+    """Sorted q file paths (keys of load_deps()' result) using any of names."""
+    return sorted(path for path, cards in deps.items() if not names.isdisjoint(cards))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Query which puzzles use which cards.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    uses_parser = commands.add_parser('uses', help='Puzzles using each card (case and diacritics ignored)')
+    uses_parser.add_argument('cards', nargs='+')
+    changed_parser = commands.add_parser('changed', help='Puzzles affected by a card lookup change')
+    changed_parser.add_argument('old_lookup', type=Path)
+    changed_parser.add_argument('new_lookup', type=Path, nargs='?', default=CARD_LOOKUP_FILE)
+    commands.add_parser('status', help='Show what the index holds')
+    args = parser.parse_args()
+
+    q_files = sorted(PROBLEMS_DIR.glob('*-q.md'))
+    deps = load_deps(q_files)
+    names = {str(q_file.resolve()): q_file.stem.replace('-q', '') for q_file in q_files}
+
+    if args.command == 'uses':
+        by_fold = {}
+        for name in reverse_index({path: {'cards': cards} for path, cards in deps.items()}):
+            by_fold.setdefault(fold(name), []).append(name)
+        for card in args.cards:
+            matches = by_fold.get(fold(card), [])
+            puzzles = sorted({names[path] for path in affected_puzzles(deps, set(matches))})
+            if puzzles:
+                print(f"✓ {' / '.join(matches)}: {', '.join(puzzles)}")
+            else:
+                print(f"❌ {card}: no puzzle uses it")
+    elif args.command == 'changed':
+        old_lookup = load_card_lookup(args.old_lookup)
+        new_lookup = load_card_lookup(args.new_lookup)
+        cards = changed_cards(old_lookup, new_lookup)
+        affected = affected_puzzles(deps, cards)
+        used = sorted(cards & set().union(*deps.values()))
+        print(f"{len(cards)} cards changed, {len(used)} of them used: {', '.join(used) or '-'}")
+        print(f"{len(affected)} of {len(deps)} puzzles affected")
+        for path in affected:
+            print(f"  {names[path]}")
+    else:
+        cards = set().union(*deps.values())
+        print(f"{len(deps)} puzzles using {len(cards)} distinct cards, indexed in {DEPS_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Card name -> NRDB code index shared by render_puzzles.py and validate_puzzles.py.
+Usage: python card_index.py [--compile | --clear | --suggest NAME]
+
+The index is loaded on first use rather than at import time. card_lookup.json
+can also be precompiled to a pickle next to it (.card_lookup.pickle), which
+unpickles much faster than the JSON parses; the pickle records the JSON's
+size and mtime and is ignored once those change.
+
+CardNameMatcher suggests real card names for a misspelt one ("did you mean"),
+from a trigram index over the diacritic-folded names.
+"""
+
+import json
+import pickle
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from common import atomic_path
+
+CARD_LOOKUP_FILE = Path(__file__).parent / "card_lookup.json"
+
+
+def compiled_file(path: Path) -> Path:
+    """Where the precompiled form of a card lookup JSON lives."""
+    return path.with_name(f".{path.stem}.pickle")
+
+
+def _stamp(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def _load_compiled(path: Path) -> dict | None:
+    """The precompiled index for path, or None if missing or out of date."""
+    try:
+        with open(compiled_file(path), 'rb') as f:
+            stamp, lookup = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+        return None
+    return lookup if stamp == _stamp(path) else None
+
+
+@lru_cache(maxsize=None)
+def load_card_lookup(path: Path = CARD_LOOKUP_FILE) -> dict:
+    """Load {card name: code}, from the precompiled form when it is current."""
+    lookup = _load_compiled(path)
+    if lookup is None:
+        with open(path) as f:
+            lookup = json.load(f)
+    return lookup
+
+
+def compile_card_lookup(path: Path = CARD_LOOKUP_FILE) -> Path:
+    """Write the precompiled form of path, return where it was written."""
+    stamp = _stamp(path)
+    with open(path) as f:
+        lookup = json.load(f)
+    target = compiled_file(path)
+    with atomic_path(target) as tmp, open(tmp, 'wb') as f:
+        pickle.dump((stamp, lookup), f, protocol=pickle.HIGHEST_PROTOCOL)
+    load_card_lookup.cache_clear()
+    return target
+
+
+def fold(text: str) -> str:
+    """Lowercase with diacritics removed, so "Karuna" meets "Karunā"."""
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c)).lower()
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of text, padded so word starts and ends count."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# A trailing note on a board card, e.g. "Enigma (inner)"
+ANNOTATION = re.compile(r'\s*\(.*\)\s*$')
+
+
+class CardNameMatcher:
+    """Approximate matcher over card names, built once per card list.
+
+    A name that equals a card's once case, diacritics or a trailing
+    "(note)" are ignored resolves directly. Otherwise candidates are the
+    cards sharing a trigram with it (from an inverted index, so only those
+    are scored) ranked by the Dice coefficient of their trigram sets.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.exact = {}
+        self.grams = []
+        self.postings = {}
+        for i, name in enumerate(self.names):
+            key = fold(name)
+            self.exact.setdefault(key, name)
+            grams = trigrams(key)
+            self.grams.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def suggest(self, name: str, limit: int = 3, cutoff: float = 0.5) -> list:
+        """Up to limit card names close to name, best first; empty when nothing scores cutoff."""
+        key = fold(name)
+        exact = self.exact.get(key) or self.exact.get(ANNOTATION.sub('', key))
+        if exact:
+            return [exact]
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        scored = sorted(((2 * count / (len(grams) + self.grams[i]), self.names[i]) for i, count in shared.items()),
+                        key=lambda item: (-item[0], item[1]))
+        return [candidate for score, candidate in scored[:limit] if score >= cutoff]
+
+
+@lru_cache(maxsize=None)
+def load_card_matcher(path: Path = CARD_LOOKUP_FILE) -> CardNameMatcher:
+    """CardNameMatcher over the cards in a lookup file, built once per process."""
+    return CardNameMatcher(load_card_lookup(path))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Manage the precompiled card lookup.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--compile', action='store_true',
+                       help=f'Precompile {CARD_LOOKUP_FILE.name} to {compiled_file(CARD_LOOKUP_FILE).name}')
+    group.add_argument('--clear', action='store_true', help='Delete the precompiled form')
+    group.add_argument('--suggest', metavar='NAME', help='Show the card names closest to NAME')
+    args = parser.parse_args()
+
+    target = compiled_file(CARD_LOOKUP_FILE)
+    if args.suggest:
+        suggestions = load_card_matcher().suggest(args.suggest)
+        print('\n'.join(suggestions) if suggestions else f"No card close to '{args.suggest}'")
+    elif args.compile:
+        compile_card_lookup()
+        print(f"Compiled {len(load_card_lookup())} cards to {target}")
+    elif args.clear:
+        target.unlink(missing_ok=True)
+        print(f"Removed {target}")
+    else:
+        state = 'current' if _load_compiled(CARD_LOOKUP_FILE) is not None else 'missing or stale'
+        print(f"{len(load_card_lookup())} cards in {CARD_LOOKUP_FILE.name}; precompiled form {state}")
+
+
+if __name__ == '__main__':
+    main()
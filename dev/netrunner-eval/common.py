@@ -0,0 +1,56 @@
+"""
+Small helpers shared by the site scripts: atomic writes, file digests,
+puzzle file pairing and the [[Card Name]] reference pattern.
+
+Every generated file (pages, manifests, caches, indexes, image objects) is
+written through atomic_path(), so a reader or a concurrent worker sees either
+the old file or the new one, never a partial write.
+"""
+
+import hashlib
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+
+# An inline card reference in puzzle markdown, e.g. [[Hedge Fund]]
+CARD_REF = re.compile(r'\[\[([^\]]+)\]\]')
+
+
+@contextmanager
+def atomic_path(path: Path):
+    """Yield a temp path next to path and rename it over path when the block succeeds."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        yield tmp
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, path)
+
+
+def write_atomic(path: Path, data: str | bytes):
+    """Write text or bytes via a temp file + rename so readers never see a partial file."""
+    with atomic_path(path) as tmp:
+        if isinstance(data, bytes):
+            tmp.write_bytes(data)
+        else:
+            tmp.write_text(data)
+
+
+def stream_atomic(path: Path, emit, *args):
+    """Like write_atomic(), but emit(write, *args) streams the text straight into the file."""
+    with atomic_path(path) as tmp, open(tmp, 'w') as f:
+        emit(f.write, *args)
+
+
+def answer_file_for(q_file: Path) -> Path:
+    """Get the -a.md answer file paired with a -q.md question file."""
+    return q_file.with_name(q_file.name.replace('-q.md', '-a.md'))
+
+
+def file_digest(path: Path) -> str | None:
+    """SHA-256 of a file's contents, or None if the file does not exist."""
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Minify the rendered site and write precompressed .gz/.br siblings.
+Usage: python compress_site.py [SITE_DIR] [--no-minify]
+
+Run after render_puzzles.py (or via its --compress flag). Every .html, .css
+and .js file under SITE_DIR is minified in place (.json files are already
+compact and kept as written), then written next to itself gzipped (.gz)
+and, when the brotli package is installed, as Brotli (.br), so a static
+server (nginx gzip_static/brotli_static, Caddy precompressed) can send the
+bytes as they are. Minifying only drops
+whitespace the browser ignores: indentation, whitespace runs and CSS
+comments; <pre> blocks are kept as written.
+
+Files whose content matches SITE_DIR/.compress-manifest.json from the last
+run are skipped. Siblings of files that are gone are removed.
+"""
+
+import gzip
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from common import file_digest, write_atomic
+
+SITE_DIR = Path(__file__).parent / "html"
+MANIFEST_NAME = ".compress-manifest.json"
+EXTENSIONS = ('.html', '.css', '.js', '.json')
+
+# Raw blocks of an HTML page, each minified by its own rules
+HTML_RAW = re.compile(r'(<pre>.*?</pre>|<style>.*?</style>|<script[^>]*>.*?</script>)', re.DOTALL)
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and whitespace around punctuation; spaces before ':' are kept (they separate selectors)."""
+    css = CSS_COMMENT.sub('', css)
+    css = CSS_PUNCTUATION.sub(r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return re.sub(r'\s+', ' ', css).replace(';}', '}').strip()
+
+
+def minify_js(js: str) -> str:
+    """Drop indentation and blank lines; statements stay on their own lines."""
+    return '\n'.join(line.strip() for line in js.split('\n') if line.strip())
+
+
+def minify_html(html: str) -> str:
+    """Collapse whitespace runs outside <pre>, and minify inline <style>/<script>."""
+    parts = HTML_RAW.split(html)
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            # A run with a newline stays a newline, so text keeps its word breaks
+            parts[i] = re.sub(r'\s+', lambda m: '\n' if '\n' in m.group() else ' ', part)
+        elif part.startswith('<style>'):
+            parts[i] = f'<style>{minify_css(part[7:-8])}</style>'
+        elif part.startswith('<script'):
+            open_tag, body = part[:part.index('>') + 1], part[part.index('>') + 1:-9]
+            parts[i] = f'{open_tag}{minify_js(body)}</script>'
+    return ''.join(parts)
+
+
+MINIFIERS = {'.html': minify_html, '.css': minify_css, '.js': minify_js}
+
+
+def brotli_compress(data: bytes) -> bytes | None:
+    """Brotli at maximum quality, or None when the brotli package is not installed."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def compress_file(path: Path, minify: bool, original_size: int | None = None) -> dict:
+    """Minify path in place and write its siblings, return its sizes in bytes.
+
+    original_size is the size as rendered, when path was already minified by an earlier run.
+    """
+    original = path.read_bytes()
+    data = original
+    if minify and path.suffix in MINIFIERS:
+        data = MINIFIERS[path.suffix](original.decode()).encode()
+        if data != original:
+            write_atomic(path, data)
+    sizes = {'original': original_size or len(original), 'minified': len(data)}
+
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    write_atomic(path.with_name(path.name + '.gz'), gz)
+    sizes['gz'] = len(gz)
+    br = brotli_compress(data)
+    if br is not None:
+        write_atomic(path.with_name(path.name + '.br'), br)
+        sizes['br'] = len(br)
+    sizes['digest'] = hashlib.sha256(data).hexdigest()
+    return sizes
+
+
+def compress_site(site_dir: Path = SITE_DIR, minify: bool = True) -> list:
+    """Process every stale file under site_dir, return [(path, sizes, processed)] for all of them."""
+    manifest_file = site_dir / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_file.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+    with_br = brotli_compress(b'') is not None
+
+    results = []
+    new_manifest = {}
+    for path in sorted(p for p in site_dir.rglob('*') if p.suffix in EXTENSIONS and not p.name.startswith('.')):
+        name = path.relative_to(site_dir).as_posix()
+        previous = manifest.get(name)
+        unchanged = (previous and previous.get('minify') == minify
+                     and previous['digest'] == file_digest(path))
+        up_to_date = (unchanged and path.with_name(path.name + '.gz').exists()
+                      and (not with_br or path.with_name(path.name + '.br').exists()))
+        if up_to_date:
+            sizes = previous
+        else:
+            sizes = {**compress_file(path, minify, previous['original'] if unchanged else None), 'minify': minify}
+        new_manifest[name] = sizes
+        results.append((name, sizes, not up_to_date))
+
+    # Siblings whose file was removed (e.g. an orphaned page)
+    for sibling in [*site_dir.rglob('*.gz'), *site_dir.rglob('*.br')]:
+        if not sibling.with_suffix('').exists():
+            sibling.unlink()
+
+    write_atomic(manifest_file, json.dumps(new_manifest, indent=2, sort_keys=True).encode())
+    return results
+
+
+def report(results: list) -> str:
+    """Savings table: a line per file processed this run, then totals over every file."""
+    def line(name, sizes):
+        best = min(sizes['gz'], sizes.get('br', sizes['gz']))
+        br = f"{sizes['br']:>10,}" if 'br' in sizes else f"{'-':>10}"
+        return (f"{name:<40} {sizes['original']:>10,} {sizes['minified']:>10,} {sizes['gz']:>10,} {br} "
+                f"{(1 - best / max(sizes['original'], 1)) * 100:>6.1f}%")
+
+    lines = [f"{'File':<40} {'original':>10} {'minified':>10} {'.gz':>10} {'.br':>10} {'saved':>7}"]
+    lines += [line(name, sizes) for name, sizes, processed in results if processed]
+    totals = {key: sum(sizes.get(key, 0) for _, sizes, _ in results) for key in ('original', 'minified', 'gz')}
+    if all('br' in sizes for _, sizes, _ in results):
+        totals['br'] = sum(sizes['br'] for _, sizes, _ in results)
+    processed = sum(1 for *_, p in results if p)
+    lines.append(line(f"total ({processed} of {len(results)} files updated)", totals))
+    return '\n'.join(lines)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Minify the rendered site and write .gz/.br siblings.')
+    parser.add_argument('site_dir', nargs='?', type=Path, default=SITE_DIR, help='Rendered site (default: html/)')
+    parser.add_argument('--no-minify', action='store_true', help='Only compress; leave files as rendered')
+    args = parser.parse_args()
+
+    print(report(compress_site(args.site_dir, not args.no_minify)))
+    if brotli_compress(b'') is None:
+        print("brotli not installed: wrote .gz only")
+
+
+if __name__ == '__main__':
+    main()
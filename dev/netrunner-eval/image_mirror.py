@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Offline, content-addressed card image mirror for render_puzzles.py --images mirror.
+Usage: python image_mirror.py ingest SOURCE [--ext .png] [--used] | python image_mirror.py status
+
+SOURCE is a directory of <code>.<ext> images (e.g. a Jinteki stock folder) or
+an http(s) base URL serving <base>/<code><ext> (e.g. a local Jinteki). Images
+are stored once per content hash under image-store/objects/, so identical
+scans (reprints) are kept once, and index.json maps each card code to its
+original and its thumbnails, with the width of each file. Thumbnails are
+generated at THUMBNAIL_WIDTHS, the widths the board layout draws; this needs
+Pillow, without it only the originals are stored (width unknown) and pages
+use those.
+
+render_puzzles.py --images mirror links the files each page uses into html/img/,
+so the rendered site works without any image server; --sprites additionally
+packs each page's cards into sprite sheets (compose_sprite_sheet).
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from card_index import load_card_lookup
+from common import CARD_REF, atomic_path, write_atomic
+
+SCRIPT_DIR = Path(__file__).parent
+STORE_DIR = SCRIPT_DIR / "image-store"
+OBJECTS_DIR = STORE_DIR / "objects"
+INDEX_FILE = STORE_DIR / "index.json"
+
+# Zoomed board (180px) and inline ref (258px) widths from render_puzzles.IMAGE_CONTEXTS,
+# at 1x and 2x pixel density
+THUMBNAIL_WIDTHS = (180, 260, 360, 520)
+THUMBNAIL_QUALITY = 80
+
+
+
+def store_object(data: bytes, ext: str) -> str:
+    """Store data under its content hash, return the object's file name."""
+    name = f"{hashlib.sha256(data).hexdigest()}{ext}"
+    path = OBJECTS_DIR / name[:2] / name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, data)
+    return name
+
+
+def object_path(name: str) -> Path:
+    return OBJECTS_DIR / name[:2] / name
+
+
+def make_thumbnails(data: bytes) -> tuple[int | None, dict]:
+    """(original width, {variant: (bytes, ext, width)} for each THUMBNAIL_WIDTHS narrower than it).
+
+    (None, {}) when Pillow is not installed.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None, {}
+    thumbnails = {}
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        for width in THUMBNAIL_WIDTHS:
+            if width >= image.width:
+                break
+            height = round(image.height * width / image.width)
+            out = io.BytesIO()
+            image.convert('RGB').resize((width, height), Image.LANCZOS).save(
+                out, 'WEBP', quality=THUMBNAIL_QUALITY)
+            thumbnails[f"w{width}"] = (out.getvalue(), '.webp', width)
+        return image.width, thumbnails
+
+
+def read_source(source: str, code: str, ext: str) -> tuple[bytes, str] | None:
+    """(image bytes, extension) for code from a directory or base URL, None if absent."""
+    if re.match(r'https?://', source):
+        from urllib.error import HTTPError
+        from urllib.request import urlopen
+        try:
+            with urlopen(f"{source.rstrip('/')}/{code}{ext}", timeout=30) as response:
+                return response.read(), ext
+        except HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+    for path in sorted(Path(source).glob(f"{code}.*")):
+        return path.read_bytes(), path.suffix
+    return None
+
+
+def used_codes(problems_dir: Path) -> set:
+    """Codes of every card drawn on a board or referenced as [[Card]] in problems_dir."""
+    from board_model import parse_board
+    from puzzle_cache import load_puzzle, puzzle_board
+
+    lookup = load_card_lookup()
+    names = set()
+    for md_file in problems_dir.glob('*-[qa].md'):
+        names.update(CARD_REF.findall(md_file.read_text()))
+        if md_file.name.endswith('-q.md'):
+            board_data = puzzle_board(load_puzzle(md_file))
+            if board_data:
+                names.update(card.name for card in parse_board(board_data).cards())
+    return {lookup[name] for name in names if name in lookup}
+
+
+def load_index() -> dict:
+    """{code: {variant: object name, 'widths': {variant: px}}}, empty if nothing has been ingested."""
+    try:
+        return json.loads(INDEX_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+@lru_cache(maxsize=None)
+def _cached_index() -> dict:
+    return load_index()
+
+
+def variant_file(code: str, variant: str | None = None) -> str | None:
+    """Object name of a card's image variant, falling back to the original; None if not mirrored."""
+    entry = _cached_index().get(code)
+    if not entry:
+        return None
+    return entry.get(variant) or entry['original']
+
+
+def variant_widths(code: str) -> dict | None:
+    """{variant: width in px} of the files the mirror holds for a card, 'original'
+    included, narrowest first; None if not mirrored.
+
+    Files whose width was not recorded (ingested without Pillow) are left out.
+    """
+    entry = _cached_index().get(code)
+    if not entry:
+        return None
+    return dict(sorted(entry.get('widths', {}).items(), key=lambda item: item[1]))
+
+
+def compose_sprite_sheet(codes: list, cell: tuple[int, int], columns: int, path: Path):
+    """Draw each code's image, resized to cell, into a grid columns cells wide, saved at path as WebP.
+
+    Cell i is at column i % columns, row i // columns. Needs Pillow.
+    """
+    from PIL import Image
+    width, height = cell
+    sheet = Image.new('RGBA', (columns * width, -(-len(codes) // columns) * height))
+    for i, code in enumerate(codes):
+        row, col = divmod(i, columns)
+        with Image.open(object_path(variant_file(code))) as image:
+            sheet.paste(image.convert('RGBA').resize(cell, Image.LANCZOS), (col * width, row * height))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(path) as tmp:
+        sheet.save(tmp, 'WEBP', quality=THUMBNAIL_QUALITY)
+
+
+def ingest(source: str, codes: list, ext: str = '.png') -> tuple[int, int]:
+    """Mirror each code's image from source, return (cards stored, cards missing)."""
+    index = load_index()
+    stored = missing = 0
+    for code in codes:
+        found = read_source(source, code, ext)
+        if found is None:
+            missing += 1
+            continue
+        data, suffix = found
+        entry = {'original': store_object(data, suffix), 'widths': {}}
+        width, thumbnails = make_thumbnails(data)
+        if width is not None:
+            entry['widths']['original'] = width
+        for variant, (thumb, thumb_ext, thumb_width) in thumbnails.items():
+            entry[variant] = store_object(thumb, thumb_ext)
+            entry['widths'][variant] = thumb_width
+        index[code] = entry
+        stored += 1
+
+    STORE_DIR.mkdir(exist_ok=True)
+    write_atomic(INDEX_FILE, json.dumps(index, indent=2, sort_keys=True))
+    _cached_index.cache_clear()
+    return stored, missing
+
+
+def publish(names: set, target_dir: Path) -> int:
+    """Hard-link (or copy) the named objects into target_dir and drop any others there.
+
+    Returns how many files were added.
+    """
+    target_dir.mkdir(parents=True, exist_ok=True)
+    added = 0
+    for name in names:
+        target = target_dir / name
+        if target.exists():
+            continue
+        try:
+            os.link(object_path(name), target)
+        except OSError:
+            target.write_bytes(object_path(name).read_bytes())
+        added += 1
+    for existing in target_dir.iterdir():
+        if existing.name not in names:
+            existing.unlink()
+    return added
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Manage the offline card image mirror.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest_parser = commands.add_parser('ingest', help='Copy card images into the mirror')
+    ingest_parser.add_argument('source', help='Directory of <code>.<ext> images, or an http(s) base URL')
+    ingest_parser.add_argument('--ext', default='.png', help='Image extension when SOURCE is a URL (default: .png)')
+    ingest_parser.add_argument('--used', action='store_true',
+                               help='Only cards drawn or referenced in problems/, not the whole card pool')
+    commands.add_parser('status', help='Show what the mirror holds')
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        codes = used_codes(SCRIPT_DIR / "problems") if args.used else set(load_card_lookup().values())
+        stored, missing = ingest(args.source, sorted(codes), args.ext)
+        print(f"Mirrored {stored} of {len(codes)} cards into {STORE_DIR} ({missing} not found in {args.source})")
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print("Pillow not installed: stored originals only, no thumbnails")
+    else:
+        index = load_index()
+        objects = [p for p in OBJECTS_DIR.glob('*/*') if p.is_file()]
+        print(f"{len(index)} cards, {len(objects)} unique files "
+              f"({sum(p.stat().st_size for p in objects) / 1024:.1f} KB) in {STORE_DIR}")
+
+
+if __name__ == '__main__':
+    main()
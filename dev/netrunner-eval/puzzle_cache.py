@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Parsed-puzzle cache shared by render_puzzles.py and validate_puzzles.py.
+Usage: python puzzle_cache.py [--clear | --prune [DAYS]]
+
+Parsing a puzzle means splitting it into ## sections and decoding each
+```yaml block. The result is pickled into .puzzle-cache/, keyed by the SHA-256
+of the file's content, so a validate-then-render run parses each puzzle once.
+Entries are touched on every hit; prune_cache() drops those of an older
+CACHE_VERSION and those no run has used for CACHE_MAX_AGE_DAYS.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import time
+from pathlib import Path
+
+from common import atomic_path
+
+CACHE_DIR = Path(__file__).parent / ".puzzle-cache"
+
+# Bump when parse_puzzle() output changes, so stale entries are ignored
+CACHE_VERSION = 2
+
+# Entries unused for this long belong to edited or deleted puzzles
+CACHE_MAX_AGE_DAYS = 14
+
+YAML_BLOCK = re.compile(r'```yaml\s*\n(.*?)```', re.DOTALL)
+
+# Starts extract_yaml()'s error for a block that ran out of time (see is_transient())
+YAML_TIMEOUT = "YAML parse timed out"
+
+
+def parse_sections(content: str) -> dict:
+    """Parse markdown into sections by ## headers."""
+    sections = {}
+    current_section = None
+    current_content = []
+
+    for line in content.split('\n'):
+        if line.startswith('## '):
+            if current_section:
+                sections[current_section] = '\n'.join(current_content).strip()
+            current_section = line[3:].strip()
+            current_content = []
+        elif line.startswith('# '):
+            sections['_title'] = line[2:].strip()
+        else:
+            current_content.append(line)
+
+    if current_section:
+        sections[current_section] = '\n'.join(current_content).strip()
+
+    return sections
+
+
+def extract_yaml(content: str) -> tuple[dict | None, str | None]:
+    """Extract and parse YAML block within the board_yaml limits, return (data, error)."""
+    import yaml  # Deferred: cache hits never need it
+    from board_yaml import BoardYAMLTimeout, load_board
+    match = YAML_BLOCK.search(content)
+    if not match:
+        return None, "No YAML block found"
+    try:
+        return load_board(match.group(1)), None
+    except BoardYAMLTimeout as e:
+        return None, f"{YAML_TIMEOUT}: {e}"
+    except yaml.YAMLError as e:
+        return None, f"YAML parse error: {e}"
+
+
+def parse_puzzle(content: str, timings: dict | None = None) -> dict:
+    """Parse puzzle markdown into its sections and decoded YAML blocks.
+
+    'yaml' maps each section holding a ```yaml block to extract_yaml()'s
+    (data, error) for it, in file order. If timings is given, the seconds
+    spent in each stage are stored under 'sections' and 'yaml'.
+    """
+    start = time.perf_counter()
+    sections = parse_sections(content)
+    parsed = time.perf_counter()
+    yaml_blocks = {key: extract_yaml(value) for key, value in sections.items()
+                   if '```yaml' in value}
+    if timings is not None:
+        timings['sections'] = parsed - start
+        timings['yaml'] = time.perf_counter() - parsed
+    return {'sections': sections, 'yaml': yaml_blocks}
+
+
+def puzzle_board(puzzle: dict) -> dict | None:
+    """The board the renderer draws: the first YAML block, or None if it didn't parse."""
+    for data, error in puzzle['yaml'].values():
+        return data if error is None else None
+    return None
+
+
+def is_transient(puzzle: dict) -> bool:
+    """Whether a parsed puzzle depends on more than its content: a YAML block
+    ran out of time, so it must not be cached anywhere."""
+    return any(error and error.startswith(YAML_TIMEOUT) for _, error in puzzle['yaml'].values())
+
+
+def _cache_file(digest: str, cache_dir: Path) -> Path:
+    return cache_dir / f"{CACHE_VERSION}-{digest}.pickle"
+
+
+def load_puzzle(path: Path, cache_dir: Path | None = CACHE_DIR, timings: dict | None = None) -> dict:
+    """Parse a puzzle file, reusing the on-disk cache when its content is unchanged.
+
+    Pass cache_dir=None to parse without touching the cache; a transient
+    parse (see is_transient()) is never cached. If timings is
+    given it receives per-stage seconds: 'read', then either 'cache' for a hit
+    or parse_puzzle()'s 'sections' and 'yaml'.
+    """
+    start = time.perf_counter()
+    content = path.read_bytes()
+    if timings is not None:
+        timings['read'] = time.perf_counter() - start
+    if cache_dir is None:
+        return parse_puzzle(content.decode(), timings)
+
+    start = time.perf_counter()
+    cache_file = _cache_file(hashlib.sha256(content).hexdigest(), cache_dir)
+    try:
+        with open(cache_file, 'rb') as f:
+            puzzle = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        pass
+    else:
+        try:
+            os.utime(cache_file)  # Marks it used, for prune_cache()
+        except OSError:
+            pass
+        if timings is not None:
+            timings['cache'] = time.perf_counter() - start
+        return puzzle
+
+    puzzle = parse_puzzle(content.decode(), timings)
+    if is_transient(puzzle):
+        return puzzle
+    cache_dir.mkdir(exist_ok=True)
+    # Write via rename so concurrent workers never read a partial entry
+    with atomic_path(cache_file) as tmp, open(tmp, 'wb') as f:
+        pickle.dump(puzzle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return puzzle
+
+
+def clear_cache(cache_dir: Path = CACHE_DIR) -> int:
+    """Delete all cache entries, return how many were removed."""
+    removed = 0
+    for entry in cache_dir.glob('*.pickle'):
+        entry.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def prune_cache(cache_dir: Path = CACHE_DIR, max_age_days: float = CACHE_MAX_AGE_DAYS) -> int:
+    """Delete entries of other cache versions and files unused for max_age_days, return how many."""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for entry in cache_dir.glob('*'):
+        # Temp files only go by age, so a write in progress is left alone
+        old_version = entry.suffix == '.pickle' and not entry.name.startswith(f"{CACHE_VERSION}-")
+        try:
+            if old_version or entry.stat().st_mtime < cutoff:
+                entry.unlink()
+                removed += 1
+        except FileNotFoundError:  # Removed by a concurrent run
+            pass
+    return removed
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Manage the parsed-puzzle cache.')
+    parser.add_argument('--clear', action='store_true', help=f'Delete all entries in {CACHE_DIR}')
+    parser.add_argument('--prune', type=float, nargs='?', const=CACHE_MAX_AGE_DAYS, metavar='DAYS',
+                        help=f'Delete entries of older cache versions and those unused for DAYS '
+                             f'(default {CACHE_MAX_AGE_DAYS}); renders and validations do this too')
+    args = parser.parse_args()
+
+    if args.clear:
+        print(f"Removed {clear_cache()} cached puzzles from {CACHE_DIR}")
+    elif args.prune is not None:
+        print(f"Removed {prune_cache(CACHE_DIR, args.prune)} stale cached puzzles from {CACHE_DIR}")
+    else:
+        entries = list(CACHE_DIR.glob('*.pickle'))
+        print(f"{len(entries)} cached puzzles in {CACHE_DIR} "
+              f"({sum(e.stat().st_size for e in entries) / 1024:.1f} KB)")
+
+
+if __name__ == '__main__':
+    main()
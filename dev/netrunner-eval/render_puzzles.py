@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Render Netrunner puzzle markdown files to HTML.
-Usage: python render_puzzles.py
+Usage: python render_puzzles.py [--images nrdb|localhost|mirror] [--sprites] [--lazy-answers] [--search] [--incremental] [--compress] [--jobs N] [--shared-assets] [--profile] [--pstats FILE]
 
 FIXES APPLIED:
 1. Card images now use NetrunnerDB CDN (artifact-compatible)
@@ -10,131 +10,227 @@ FIXES APPLIED:
 4. Server root displays cards horizontally (flex)
 """
 
+import hashlib
 import json
+import os
 import re
+import sys
+from dataclasses import dataclass, field, replace
+from functools import lru_cache, partial
 from pathlib import Path
-
-import yaml
+from string import Formatter
+
+from board_model import MAX_GRIP_COUNT, Board, Card, Grip, Rig, Server, parse_board
+from card_index import load_card_lookup
+from common import answer_file_for, file_digest, stream_atomic, write_atomic
+import card_deps
+import image_mirror
+import puzzle_cache
+import search_index
+from puzzle_cache import CACHE_DIR, extract_yaml, is_transient, load_puzzle, puzzle_board
+from puzzle_cache import parse_sections as parse_markdown_sections
+from stage_profile import StageProfile, run_profiled
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PROBLEMS_DIR = SCRIPT_DIR / "problems"
 HTML_DIR = SCRIPT_DIR / "html"
-CARD_LOOKUP_FILE = SCRIPT_DIR / "card_lookup.json"
+MANIFEST_FILE = HTML_DIR / ".render-manifest.json"
+
+# Sources whose edits change the rendered pages (HTML_TEMPLATE lives in this file)
+RENDERER_SOURCES = [Path(__file__), SCRIPT_DIR / "board_model.py", SCRIPT_DIR / "board_yaml.py",
+                    SCRIPT_DIR / "puzzle_cache.py", SCRIPT_DIR / "image_mirror.py", SCRIPT_DIR / "search_index.py"]
 
-# Image source configuration
+# Image source configuration. 'sizes' maps each variant directory under
+# 'base' to its image width in px, smallest first.
 IMAGE_SOURCES = {
     'nrdb': {
-        'base': 'https://card-images.netrunnerdb.com/v2/xlarge',
-        'ext': '.webp'
+        'base': 'https://card-images.netrunnerdb.com/v2',
+        'ext': '.webp',
+        'sizes': {'small': 150, 'medium': 300, 'large': 600, 'xlarge': 1000},
     },
     'localhost': {
-        'base': 'http://localhost:1042/img/cards/en/default/stock',
-        'ext': '.png'
-    }
+        'base': 'http://localhost:1042/img/cards/en/default',
+        'ext': '.png',
+        'sizes': {'stock': 300},
+    },
+    # Content-addressed files from image_mirror.py, linked into html/img/
+    'mirror': {
+        'base': 'img',
+        'ext': '',
+        'sizes': {f"w{width}": width for width in image_mirror.THUMBNAIL_WIDTHS},
+    },
 }
 
-# Default to NRDB for artifact compatibility (can be overridden via CLI)
-IMAGE_SOURCE = 'nrdb'
+# How big each kind of card image is drawn, in CSS px: (width, height, hover zoom).
+# Must match the .board-card img / .card-ref img rules in HTML_TEMPLATE.
+IMAGE_CONTEXTS = {
+    'board': (100, 140, 1.8),  # Server, rig and grip cards
+    'ref': (129, 180, 2),  # Inline [[Card]] refs
+}
+
+# Shared CSS/JS (--shared-assets), mirror files (--images mirror), sprite
+# sheets (--sprites), answer fragments (--lazy-answers) and the search index (--search)
+ASSETS_DIR = HTML_DIR / "assets"
+MIRROR_IMAGES_DIR = HTML_DIR / "img"
+SPRITES_DIR = HTML_DIR / "sprites"
+SPRITE_COLUMNS = 8
+ANSWERS_DIR = HTML_DIR / "answers"
+SEARCH_INDEX_FILE = HTML_DIR / "search-index.json"
+
+
+@dataclass(slots=True)
+class RenderContext:
+    """The modes a site or page renders with, and what a page collects while it renders.
+
+    Passed down explicitly to every emit_*/render_* function that draws cards
+    or fills the page template, so pages with different settings can render
+    concurrently in one process. The defaults match a plain render_puzzles.py
+    run; build_puzzle_page() starts each page from the site's context with
+    replace(), filling in its per-page fields.
+    """
+    # Default to NRDB for artifact compatibility (can be overridden via CLI)
+    image_source: str = 'nrdb'
+    # {card name: code} to render with; None uses card_lookup.json
+    card_lookup: dict | None = None
+    # Link one content-hashed stylesheet/script under html/assets/ instead of
+    # inlining them in every page (--shared-assets)
+    shared_assets: bool = False
+    # Draw mirrored cards from per-page sprite sheets, one per image context (--sprites)
+    sprites: bool = False
+    # Write each answer to html/answers/ and fetch it when "Show Answer" is
+    # first clicked, instead of embedding it in the page (--lazy-answers)
+    lazy_answers: bool = False
+    # Write a prebuilt search index and make index.html a paginated search page
+    # over it instead of one table row per puzzle (--search, see search_index.py)
+    search: bool = False
+    # Write card images as data-card/data-ctx attributes for a client to fill in
+    # from the image config, instead of full URLs (bundle_site.py)
+    deferred_images: bool = False
+
+    # Per page: the sheet URL pattern under --sprites, and {image context: {code: cell index}}
+    # in first-use order; the answer fragment under --lazy-answers; the mirror files used
+    sprite_url: str | None = None
+    page_sprites: dict = field(default_factory=dict)
+    answer_url: str | None = None
+    mirror_files: set = field(default_factory=set)
+
+
+# Used by the emit_*/render_* functions when no context is passed; nothing is
+# collected into it, as it has neither sprites nor mirror images
+PLAIN = RenderContext()
+
+
+def get_card_image_url(code: str, size: str | None = None, ctx: RenderContext = PLAIN) -> str:
+    """Get the image URL for a card code; size is a variant name, default the largest.
+
+    Cards missing from the mirror fall back to NRDB.
+    """
+    src = IMAGE_SOURCES[ctx.image_source]
+    if ctx.image_source == 'mirror':
+        name = image_mirror.variant_file(code, size)
+        if name:
+            ctx.mirror_files.add(name)
+            return f"{src['base']}/{name}"
+        src = IMAGE_SOURCES['nrdb']
+        size = None
+    if size is None:
+        size = list(src['sizes'])[-1]
+    return f"{src['base']}/{size}/{code}{src['ext']}"
+
+
+def card_img_attrs(code: str, context: str, ctx: RenderContext = PLAIN) -> str:
+    """src/srcset/sizes/width/height/loading attributes for a card image drawn in context.
+
+    sizes covers the hover zoom, so zoomed cards stay sharp; src falls back to
+    the smallest variant at least that wide.
+    """
+    width, height, zoom = IMAGE_CONTEXTS[context]
+    if ctx.deferred_images:
+        return f'data-card="{code}" data-ctx="{context}" width="{width}" height="{height}" loading="lazy"'
+    shown = round(width * zoom)
+    variants = image_variants(code, ctx)
+    if not variants:
+        # No file with a known width: a srcset would claim one
+        return f'src="{get_card_image_url(code, None, ctx)}" width="{width}" height="{height}" loading="lazy"'
+    fallback = next((size for size, w in variants.items() if w >= shown), list(variants)[-1])
+    srcset = ', '.join(f"{get_card_image_url(code, size, ctx)} {w}w" for size, w in variants.items())
+    return (f'src="{get_card_image_url(code, fallback, ctx)}" srcset="{srcset}" sizes="{shown}px" '
+            f'width="{width}" height="{height}" loading="lazy"')
+
+
+def image_variants(code: str, ctx: RenderContext = PLAIN) -> dict:
+    """{variant: width in px} of the images a card has in ctx's source, narrowest first.
+
+    For the mirror these are the files it actually holds, at their real widths;
+    a card missing from it has only NRDB's largest image.
+    """
+    if ctx.image_source != 'mirror':
+        return IMAGE_SOURCES[ctx.image_source]['sizes']
+    widths = image_mirror.variant_widths(code)
+    if widths is None:
+        largest, width = list(IMAGE_SOURCES['nrdb']['sizes'].items())[-1]
+        return {largest: width}
+    return widths
+
+
+def sprite_cell(context: str) -> tuple[int, int]:
+    """Sprite sheet cell size for a context: the hover-zoomed size, so zoomed cards stay sharp."""
+    width, height, zoom = IMAGE_CONTEXTS[context]
+    return round(width * zoom), round(height * zoom)
+
 
-# Load card lookup
-with open(CARD_LOOKUP_FILE) as f:
-    CARD_LOOKUP = json.load(f)
+def card_sprite(code: str, context: str, card_name: str, ctx: RenderContext = PLAIN) -> str | None:
+    """A <span> showing a card from the page's sprite sheet, or None outside --sprites
+    or for cards not in the mirror."""
+    if ctx.sprite_url is None or not image_mirror.variant_file(code):
+        return None
+    cells = ctx.page_sprites.setdefault(context, {})
+    row, col = divmod(cells.setdefault(code, len(cells)), SPRITE_COLUMNS)
+    width, height, _ = IMAGE_CONTEXTS[context]
+    return (f'<span class="sprite" role="img" aria-label="{card_name}" title="{card_name}" '
+            f'style="background-image: url({ctx.sprite_url.format(context)}); '
+            f'background-size: {SPRITE_COLUMNS * width}px auto; '
+            f'background-position: {-col * width}px {-row * height}px"></span>')
 
 
-def get_card_image_url(code: str) -> str:
-    """Get the full image URL for a card code."""
-    src = IMAGE_SOURCES[IMAGE_SOURCE]
-    return f"{src['base']}/{code}{src['ext']}"
+def card_code(card_name: str, ctx: RenderContext = PLAIN) -> str | None:
+    """NRDB code for a card name, from ctx.card_lookup when set, else card_lookup.json."""
+    lookup = ctx.card_lookup if ctx.card_lookup is not None else load_card_lookup()
+    return lookup.get(card_name)
 
 
-def card_to_img(card_name: str) -> str:
+def card_to_img(card_name: str, ctx: RenderContext = PLAIN) -> str:
     """Convert card name to <img> tag."""
-    code = CARD_LOOKUP.get(card_name)
+    code = card_code(card_name, ctx)
     if code:
-        url = get_card_image_url(code)
-        return f'<span class="card-ref"><img src="{url}" alt="{card_name}" title="{card_name}"><span class="card-name">{card_name}</span></span>'
+        img = card_sprite(code, 'ref', card_name, ctx) or f'<img {card_img_attrs(code, "ref", ctx)} alt="{card_name}" title="{card_name}">'
+        return f'<span class="card-ref">{img}<span class="card-name">{card_name}</span></span>'
     return f'<span class="card-missing">{card_name}</span>'
 
 
-def replace_card_refs(text: str) -> str:
-    """Replace [[Card Name]] with card images."""
-    return re.sub(r'\[\[([^\]]+)\]\]', lambda m: card_to_img(m.group(1)), text)
-
-
-def replace_icons(text: str) -> str:
-    """Replace [credit], [Click] etc with styled spans."""
-    text = re.sub(r'\[credit\]', '<span class="icon credit"></span>', text)
-    text = re.sub(r'\[Click\]', '<span class="icon click"></span>', text)
-    text = re.sub(r'\[mu\]', '<span class="icon mu"></span>', text)
-    text = re.sub(r'\[link\]', '<span class="icon link"></span>', text)
-    text = re.sub(r'\[trash\]', '<span class="icon trash"></span>', text)
-    text = re.sub(r'\[recurring-credit\]', '<span class="icon recurring"></span>', text)
-    return text
-
-
-def parse_markdown_sections(content: str) -> dict:
-    """Parse markdown into sections by ## headers."""
-    sections = {}
-    current_section = None
-    current_content = []
-
-    for line in content.split('\n'):
-        if line.startswith('## '):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = line[3:].strip()
-            current_content = []
-        elif line.startswith('# '):
-            sections['_title'] = line[2:].strip()
-        else:
-            current_content.append(line)
-
-    if current_section:
-        sections[current_section] = '\n'.join(current_content).strip()
+TABLE_SEPARATOR = re.compile(r'^[\s|:\-]+$')
+BOLD = re.compile(r'\*\*([^*]+)\*\*')
 
-    return sections
 
-
-def parse_markdown_table(text: str) -> str:
-    """FIX 3: Convert markdown tables to HTML tables."""
-    lines = text.split('\n')
-    result = []
-    in_table = False
-    table_lines = []
-    
-    for line in lines:
-        # Check if this is a table row (starts with |)
-        if line.strip().startswith('|') and line.strip().endswith('|'):
-            if not in_table:
-                in_table = True
-                table_lines = []
-            table_lines.append(line)
-        else:
-            # End of table or not a table
-            if in_table:
-                result.append(render_table(table_lines))
-                in_table = False
-                table_lines = []
-            result.append(line)
-    
-    # Handle table at end of content
-    if in_table:
-        result.append(render_table(table_lines))
-    
-    return '\n'.join(result)
+def collect(emit, *args) -> str:
+    """Run an emit_* function into a buffer and return what it wrote."""
+    parts = []
+    emit(parts.append, *args)
+    return ''.join(parts)
 
 
-def render_table(lines: list) -> str:
-    """Render a markdown table as HTML."""
+def emit_table(write, lines: list):
+    """Write a markdown table as HTML."""
     if len(lines) < 2:
-        return '\n'.join(lines)
+        write('\n'.join(lines))
+        return
     
-    html = '<table class="run-table">'
+    write('<table class="run-table">')
     
     for i, line in enumerate(lines):
         # Skip separator line (contains only |, -, :, spaces)
-        if re.match(r'^[\s|:\-]+$', line):
+        if TABLE_SEPARATOR.match(line):
             continue
         
         # Parse cells
@@ -142,145 +238,178 @@ def render_table(lines: list) -> str:
         
         if i == 0:
             # Header row
-            html += '<thead><tr>'
-            for cell in cells:
-                html += f'<th>{cell}</th>'
-            html += '</tr></thead><tbody>'
+            write(f"<thead><tr><th>{'</th><th>'.join(cells)}</th></tr></thead><tbody>")
         else:
-            # Data row
-            html += '<tr>'
-            for cell in cells:
-                # Apply formatting to cell content
-                cell = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', cell)
-                html += f'<td>{cell}</td>'
-            html += '</tr>'
+            # Data row; apply formatting to cell content
+            cells = [BOLD.sub(r'<strong>\1</strong>', cell) if '**' in cell else cell for cell in cells]
+            write(f"<tr><td>{'</td><td>'.join(cells)}</td></tr>")
     
-    html += '</tbody></table>'
-    return html
+    write('</tbody></table>')
 
 
-def render_section(title: str, content: str) -> str:
-    """Render a section to HTML."""
-    # FIX 3: Parse markdown tables BEFORE other processing
-    content = parse_markdown_table(content)
-    
-    # Handle code blocks
-    content = re.sub(
-        r'```\n?(.*?)\n?```',
-        lambda m: f'<pre>{m.group(1)}</pre>',
-        content,
-        flags=re.DOTALL
-    )
-
-    # Bold text
-    content = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', content)
-
-    # Replace card refs and icons
-    content = replace_card_refs(content)
-    content = replace_icons(content)
-
-    # Convert subroutine arrows
-    content = content.replace('↳', '<span class="subroutine">↳</span>')
-
-    # Paragraphs (but not inside tables)
-    # Split by double newlines, but preserve tables
-    parts = re.split(r'(<table.*?</table>)', content, flags=re.DOTALL)
-    processed_parts = []
-    for part in parts:
-        if part.startswith('<table'):
-            processed_parts.append(part)
-        else:
-            # Convert double newlines to paragraph breaks
-            part = re.sub(r'\n\n+', '</p><p>', part)
-            if part.strip():
-                part = f'<p>{part}</p>'
-            processed_parts.append(part)
-    content = ''.join(processed_parts)
-
-    return f'''
+def render_table(lines: list) -> str:
+    """Render a markdown table as HTML."""
+    return collect(emit_table, lines)
+
+
+# Icon tokens ([credit], [Click], ...) and the CSS class each one renders as
+ICON_CLASSES = {
+    'credit': 'credit',
+    'Click': 'click',
+    'mu': 'mu',
+    'link': 'link',
+    'trash': 'trash',
+    'recurring-credit': 'recurring',
+}
+
+_ICON_PATTERN = '|'.join(map(re.escape, ICON_CLASSES))
+_TABLE_LINE = r'[^\S\n]*\|(?:[^\n]*\|)?[^\S\n]*(?=\n|\Z)'
+_TABLE = rf'{_TABLE_LINE}(?:\n{_TABLE_LINE})+'
+
+# Every construct of the puzzle markdown dialect in one alternation, so a
+# section is rendered in a single scan instead of a chain of re.sub passes.
+# Each token starts with one of a handful of characters, which is consumed up
+# front so the regex engine can skip plain text with its fast charset search;
+# the lookbehinds then pick the branch. Tables are runs of 2+ whole lines
+# starting and ending with |.
+MARKUP_TOKEN = re.compile(
+    r'[\n`*\[↳](?:'
+    rf'(?<=\n)(?:(?P<breaks>\n+)?(?P<table>{_TABLE})|\n+(?P<para>))'
+    r'|(?<=`)``\n?(?P<code>(?s:.*?))\n?```'
+    r'|(?<=\*)\*(?P<bold>[^*]+)\*\*'
+    rf'|(?<=\[)(?:\[(?P<card>[^\]]+)\]\]|(?P<icon>{_ICON_PATTERN})\])'
+    r'|(?<=↳)(?P<sub>))'
+)
+TABLE_BLOCK = re.compile(_TABLE)
+MARKUP_CHARS = re.compile(r'[\n`*\[↳]')
+
+# Brackets rendered tables while a section is scanned, so paragraphs can be
+# wrapped around them afterwards
+_TABLE_MARK = '\x00'
+
+
+def _render_table_lines(text: str, ctx: RenderContext) -> str:
+    """Render matched table rows, marked for paragraph splitting."""
+    html = MARKUP_TOKEN.sub(partial(_render_token, ctx), render_table(text.split('\n')))
+    return f'{_TABLE_MARK}{html}{_TABLE_MARK}'
+
+
+def _render_token(ctx: RenderContext, m: re.Match) -> str:
+    """HTML for any MARKUP_TOKEN match."""
+    kind = m.lastgroup
+    if kind == 'para':
+        return '</p><p>'
+    if kind == 'table':
+        return ('</p><p>' if m.group('breaks') else '\n') + _render_table_lines(m.group('table'), ctx)
+    if kind == 'code':
+        code = _render_blocks(m.group('code'), line_start=m.group().startswith('```\n'), ctx=ctx)
+        return f'<pre>{code}</pre>'
+    if kind == 'bold':
+        text = m.group('bold')
+        if MARKUP_CHARS.search(text):
+            text = _render_blocks(text, line_start=False, ctx=ctx)
+        return f'<strong>{text}</strong>'
+    if kind == 'card':
+        return card_to_img(m.group('card'), ctx)
+    if kind == 'icon':
+        return f'<span class="icon {ICON_CLASSES[m.group("icon")]}"></span>'
+    return '<span class="subroutine">↳</span>'
+
+
+def _render_blocks(text: str, line_start: bool, ctx: RenderContext) -> str:
+    """Render a span of markdown; line_start says whether it begins a line
+    (only then can a table start right at the beginning)."""
+    head = ''
+    if line_start:
+        m = TABLE_BLOCK.match(text)
+        if m:
+            head = _render_table_lines(m.group(), ctx)
+            text = text[m.end():]
+    return head + MARKUP_TOKEN.sub(partial(_render_token, ctx), text)
+
+
+def render_markup(content: str, ctx: RenderContext = PLAIN) -> str:
+    """Render section markdown (tables, ``` blocks, bold, [[Card]] refs, icons,
+    paragraphs) to HTML in a single scan."""
+    parts = _render_blocks(content, line_start=True, ctx=ctx).split(_TABLE_MARK)
+    # Even parts are text between tables; odd parts are the tables themselves
+    for i in range(0, len(parts), 2):
+        if parts[i].strip():
+            parts[i] = f'<p>{parts[i]}</p>'
+    return ''.join(parts)
+
+
+def emit_section(write, title: str, content: str, ctx: RenderContext = PLAIN):
+    """Write a section as HTML."""
+    write(f'''
     <section class="puzzle-section">
         <h2>{title}</h2>
-        <div class="section-content">{content}</div>
-    </section>'''
+        <div class="section-content">''')
+    write(render_markup(content, ctx))
+    write('''</div>
+    </section>''')
 
 
-def render_answer(content: str) -> str:
-    """Render answer markdown to HTML."""
+def render_section(title: str, content: str, ctx: RenderContext = PLAIN) -> str:
+    """Render a section to HTML."""
+    return collect(emit_section, title, content, ctx)
+
+
+def emit_answer(write, content: str, ctx: RenderContext = PLAIN):
+    """Write answer markdown as HTML, one section per ## header."""
     sections = parse_markdown_sections(content)
-    html_parts = []
+    first = True
 
     for key, value in sections.items():
         if key.startswith('_'):
             continue
-        html_parts.append(render_section(key, value))
+        if not first:
+            write('\n')
+        emit_section(write, key, value, ctx)
+        first = False
 
-    return '\n'.join(html_parts)
 
+def render_answer(content: str, ctx: RenderContext = PLAIN) -> str:
+    """Render answer markdown to HTML."""
+    return collect(emit_answer, content, ctx)
 
-def render_appendix_section(title: str, content: str) -> str:
-    """Render an appendix section (collapsible, for reference material like card text)."""
-    # Use the same rendering as regular sections
-    content = parse_markdown_table(content)
-    
-    content = re.sub(
-        r'```\n?(.*?)\n?```',
-        lambda m: f'<pre>{m.group(1)}</pre>',
-        content,
-        flags=re.DOTALL
-    )
-
-    content = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', content)
-    content = replace_card_refs(content)
-    content = replace_icons(content)
-    content = content.replace('↳', '<span class="subroutine">↳</span>')
-
-    parts = re.split(r'(<table.*?</table>)', content, flags=re.DOTALL)
-    processed_parts = []
-    for part in parts:
-        if part.startswith('<table'):
-            processed_parts.append(part)
-        else:
-            part = re.sub(r'\n\n+', '</p><p>', part)
-            if part.strip():
-                part = f'<p>{part}</p>'
-            processed_parts.append(part)
-    content = ''.join(processed_parts)
 
-    return f'''
+def emit_appendix_section(write, title: str, content: str, ctx: RenderContext = PLAIN):
+    """Write an appendix section (collapsible, for reference material like card text)."""
+    write(f'''
     <details class="appendix-section">
         <summary><h2>{title}</h2></summary>
-        <div class="section-content">{content}</div>
-    </details>'''
+        <div class="section-content">''')
+    write(render_markup(content, ctx))
+    write('''</div>
+    </details>''')
+
+
+def render_appendix_section(title: str, content: str, ctx: RenderContext = PLAIN) -> str:
+    """Render an appendix section (collapsible, for reference material like card text)."""
+    return collect(emit_appendix_section, title, content, ctx)
 
 
 def parse_board_yaml(content: str) -> dict | None:
     """Extract and parse ```yaml board block from markdown."""
-    match = re.search(r'```yaml\s*\n(.*?)```', content, re.DOTALL)
-    if not match:
-        return None
-    try:
-        return yaml.safe_load(match.group(1))
-    except yaml.YAMLError:
-        return None
+    data, _ = extract_yaml(content)
+    return data
 
 
-def render_card_in_server(card_data: dict | str, show_face: bool = True) -> str:
+def render_card_in_server(card: Card, show_face: bool = True, ctx: RenderContext = PLAIN) -> str:
     """Render a single card in a server context.
     
     FIX 2: Corrected faceup logic. show_face=True means always show the card face
     (used for rig cards). show_face=False means respect the faceup/rezzed state.
     """
-    if isinstance(card_data, str):
-        card_data = {'card': card_data}
-
-    card_name = card_data.get('card', 'Unknown')
-    rezzed = card_data.get('rezzed', False)
-    faceup = card_data.get('faceup', rezzed)  # faceup defaults to rezzed state
-    credits = card_data.get('credits')
-    adv = card_data.get('adv')
+    card_name = card.name
+    rezzed = card.rezzed
+    faceup = card.faceup
+    credits = card.credits
+    adv = card.adv
 
     # Get card image
-    code = CARD_LOOKUP.get(card_name)
+    code = card_code(card_name, ctx)
 
     classes = ['board-card']
     if rezzed:
@@ -298,8 +427,7 @@ def render_card_in_server(card_data: dict | str, show_face: bool = True) -> str:
 
     # FIX 2: Show card face if faceup OR if show_face is True
     if code and (faceup or show_face):
-        url = get_card_image_url(code)
-        img = f'<img src="{url}" alt="{card_name}" title="{card_name}">'
+        img = card_sprite(code, 'board', card_name, ctx) or f'<img {card_img_attrs(code, "board", ctx)} alt="{card_name}" title="{card_name}">'
     elif not faceup:
         # Show card back for unrezzed/facedown
         img = f'<div class="card-back" title="Unrezzed card"></div>'
@@ -309,172 +437,161 @@ def render_card_in_server(card_data: dict | str, show_face: bool = True) -> str:
     return f'<div class="{" ".join(classes)}">{img}{badge}</div>'
 
 
-def render_ice_stack(ice_list: list) -> str:
-    """Render a vertical ICE stack (outermost at top)."""
+def emit_ice_stack(write, ice_list: list[Card], ctx: RenderContext = PLAIN):
+    """Write a vertical ICE stack (outermost at top)."""
     if not ice_list:
-        return ''
+        return
 
-    html = '<div class="ice-stack">'
+    write('<div class="ice-stack">')
     for ice in ice_list:  # First is outermost (top)
-        html += render_card_in_server(ice, show_face=False)  # ICE respects faceup/rezzed
-    html += '</div>'
-    return html
+        write(render_card_in_server(ice, show_face=False, ctx=ctx))  # ICE respects faceup/rezzed
+    write('</div>')
 
 
-def render_server(name: str, server_data: dict) -> str:
-    """Render a single server column."""
-    ice_html = render_ice_stack(server_data.get('ice', []))
+def emit_server(write, server: Server, ctx: RenderContext = PLAIN):
+    """Write a single server column."""
+    write(f'''
+    <div class="server">
+        <div class="server-name">{server.name}</div>
+        ''')
+    emit_ice_stack(write, server.ice, ctx)
+    write('\n        ')
 
     # Root cards (asset/agenda + upgrades in server)
-    root = server_data.get('root')
-    root_html = ''
-    if root:
-        if isinstance(root, list):
-            # Multiple cards in root (e.g., asset + upgrade)
-            cards_html = ''.join(render_card_in_server(c, show_face=False) for c in root)
-            root_html = f'<div class="server-root">{cards_html}</div>'
-        else:
-            root_html = f'<div class="server-root">{render_card_in_server(root, show_face=False)}</div>'
+    if server.root:
+        write('<div class="server-root">')
+        for card in server.root:
+            write(render_card_in_server(card, show_face=False, ctx=ctx))
+        write('</div>')
+    write('''
+    </div>''')
 
-    return f'''
-    <div class="server">
-        <div class="server-name">{name}</div>
-        {ice_html}
-        {root_html}
-    </div>'''
 
+def emit_rig(write, rig: Rig, ctx: RenderContext = PLAIN):
+    """Write runner's rig as a horizontal row."""
+    if not rig.cards:
+        write('<div class="rig-empty">No installed cards</div>')
+        return
+
+    write('<div class="rig">')
+    for card in rig.cards:
+        write(render_card_in_server(card, show_face=True, ctx=ctx))  # Rig cards always visible
+    write('</div>')
 
-def render_rig(rig_list: list) -> str:
-    """Render runner's rig as a horizontal row."""
-    if not rig_list:
-        return '<div class="rig-empty">No installed cards</div>'
 
-    html = '<div class="rig">'
-    for card in rig_list:
-        html += render_card_in_server(card, show_face=True)  # Rig cards always visible
-    html += '</div>'
-    return html
+# A facedown grip card; count-only grips repeat it, so it is built once
+GRIP_CARD_BACK = '<div class="board-card grip-card"><div class="card-back" title="Card in grip"></div></div>'
 
 
-def render_grip(grip_data) -> str:
-    """Render runner's grip (hand) as a horizontal row of cards."""
-    if not grip_data:
-        return '<div class="grip-empty">Empty grip</div>'
+def emit_grip(write, grip: Grip, ctx: RenderContext = PLAIN):
+    """Write runner's grip (hand) as a horizontal row of cards."""
+    if not grip.count:
+        write('<div class="grip-empty">Empty grip</div>')
+        return
     
+    write('<div class="grip">')
     # Handle both list of cards and just a count
-    if isinstance(grip_data, int):
-        # Just a count, show facedown cards
-        html = '<div class="grip">'
-        for _ in range(grip_data):
-            html += '<div class="board-card grip-card"><div class="card-back" title="Card in grip"></div></div>'
-        html += '</div>'
-        return html
-    
-    # List of card names
-    html = '<div class="grip">'
-    for card in grip_data:
-        if isinstance(card, str):
-            card_data = {'card': card}
-        else:
-            card_data = card
-        html += render_card_in_server(card_data, show_face=True)
-    html += '</div>'
-    return html
-
-
-def render_board(board: dict) -> str:
-    """Render full board state from YAML structure."""
-    corp = board.get('corp', {})
-    runner = board.get('runner', {})
-
-    # Corp section
-    corp_credits = corp.get('credits', 0)
-    corp_points = corp.get('points', 0)
-    corp_clicks = corp.get('clicks', 3)
-
-    # Collect all servers
-    servers_html = ''
-    server_order = ['HQ', 'R&D', 'Archives']  # Centrals first
-
-    # Add centrals
-    for srv_name in server_order:
-        if srv_name in corp:
-            servers_html += render_server(srv_name, corp[srv_name])
-
-    # Add remotes
-    for key, val in corp.items():
-        if key.startswith('Server') or key.startswith('Remote'):
-            servers_html += render_server(key, val)
-
-    # Runner section
-    runner_credits = runner.get('credits', 0)
-    runner_points = runner.get('points', 0)
-    runner_clicks = runner.get('clicks', 4)
-    grip_data = runner.get('grip', 0)
-    grip_count = len(grip_data) if isinstance(grip_data, list) else grip_data
-
-    rig_html = render_rig(runner.get('rig', []))
-    grip_html = render_grip(grip_data)
-
-    return f'''
+    if grip.cards is None:
+        # Just a count, show facedown cards (board_schema rejects counts over the cap)
+        for _ in range(min(grip.count, MAX_GRIP_COUNT)):
+            write(GRIP_CARD_BACK)
+    else:
+        for card in grip.cards:
+            write(render_card_in_server(card, show_face=True, ctx=ctx))
+    write('</div>')
+
+
+def emit_board(write, board: Board, ctx: RenderContext = PLAIN):
+    """Write full board state (see board_model.parse_board)."""
+    corp = board.corp
+    runner = board.runner
+
+    write(f'''
     <section class="puzzle-section board-section">
         <h2>Board State</h2>
         <div class="board">
             <div class="corp-side">
                 <div class="side-header">
                     <span class="side-label">Corp</span>
-                    <span class="side-stats">${corp_credits} · {corp_points} pts · {corp_clicks} clicks</span>
+                    <span class="side-stats">${corp.credits} · {corp.points} pts · {corp.clicks} clicks</span>
                 </div>
                 <div class="servers">
-                    {servers_html}
+                    ''')
+    # Servers come normalized with centrals first
+    for server in corp.servers:
+        emit_server(write, server, ctx)
+    write(f'''
                 </div>
             </div>
             <div class="runner-side">
                 <div class="side-header">
                     <span class="side-label">Runner</span>
-                    <span class="side-stats">${runner_credits} · {runner_points} pts · {runner_clicks} clicks</span>
+                    <span class="side-stats">${runner.credits} · {runner.points} pts · {runner.clicks} clicks</span>
                 </div>
                 <div class="grip-container">
-                    <div class="grip-label">Grip ({grip_count} cards)</div>
-                    {grip_html}
+                    <div class="grip-label">Grip ({runner.grip.count} cards)</div>
+                    ''')
+    emit_grip(write, runner.grip, ctx)
+    write('''
                 </div>
                 <div class="rig-container">
                     <div class="rig-label">Rig</div>
-                    {rig_html}
+                    ''')
+    emit_rig(write, runner.rig, ctx)
+    write('''
                 </div>
             </div>
         </div>
-    </section>'''
+    </section>''')
 
 
-def render_puzzle(q_file: Path) -> str:
-    """Render a puzzle Q file (and its A file) to HTML."""
+def render_board(board: Board, ctx: RenderContext = PLAIN) -> str:
+    """Render full board state (see board_model.parse_board)."""
+    return collect(emit_board, board, ctx)
+
+
+def emit_puzzle(write, q_file: Path, cache_dir: Path | None = CACHE_DIR, template: str | None = None,
+                ctx: RenderContext = PLAIN):
+    """Write a puzzle Q file (and its A file) as an HTML page.
+
+    The page is streamed fragment by fragment, so no full-page string is built.
+    The Q file is parsed through the shared puzzle cache (see puzzle_cache.py);
+    pass cache_dir=None to bypass it. template replaces page_template(ctx).
+    """
 
     # Read question file
-    q_content = q_file.read_text()
-    q_sections = parse_markdown_sections(q_content)
+    q_puzzle = load_puzzle(q_file, cache_dir)
 
     # Read answer file
-    a_file = q_file.with_name(q_file.name.replace('-q.md', '-a.md'))
+    a_file = answer_file_for(q_file)
     a_content = a_file.read_text() if a_file.exists() else ''
 
+    emit_parsed_puzzle(write, q_puzzle, a_content, q_file.stem, template, ctx)
+
+
+def emit_parsed_puzzle(write, q_puzzle: dict, a_content: str, default_title: str, template: str | None = None,
+                       ctx: RenderContext = PLAIN):
+    """Write a parsed question (see puzzle_cache.parse_puzzle) and its answer
+    markdown as an HTML page; default_title is used when the question has no # title."""
+    q_sections = q_puzzle['sections']
+
     # Extract title and difficulty
-    title = q_sections.get('_title', q_file.stem)
+    title = q_sections.get('_title', default_title)
     difficulty_match = re.search(r'\[(Easy|Medium|Hard)\]', title)
     difficulty = difficulty_match.group(1) if difficulty_match else 'Unknown'
     problem_name = re.sub(r'\s*\[.*?\]', '', title).replace('Problem: ', '')
 
     # Check for structured board YAML
-    board_data = parse_board_yaml(q_content)
+    board_data = puzzle_board(q_puzzle)
 
-    # Build HTML sections in order, each section rendered only once
+    # Pick sections in order, each rendered only once; emitters run when the page reaches them
     html_sections = []
     rendered = set()
 
     # 1. Situation/Context first
     for key in q_sections:
         if key in ('Situation', 'Context'):
-            html_sections.append(render_section(key, q_sections[key]))
+            html_sections.append(partial(emit_section, title=key, content=q_sections[key], ctx=ctx))
             rendered.add(key)
             break
 
@@ -485,13 +602,13 @@ def render_puzzle(q_file: Path) -> str:
         if key.startswith('_'):
             continue
         if key in ('Question', 'Questions') or key.startswith('Question ') or key.startswith('Questions '):
-            html_sections.append(render_section(key, q_sections[key]))
+            html_sections.append(partial(emit_section, title=key, content=q_sections[key], ctx=ctx))
             rendered.add(key)
             break
 
     # 3. Board state - use visual renderer if YAML present, else fall back to text
     if board_data:
-        html_sections.append(render_board(board_data))
+        html_sections.append(partial(emit_board, board=parse_board(board_data), ctx=ctx))
         rendered.add('Board State')
         
         # Also render any text content in Board State section outside the YAML block
@@ -499,14 +616,15 @@ def render_puzzle(q_file: Path) -> str:
         # Remove the YAML block to get remaining text
         remaining_text = re.sub(r'```yaml\s*\n.*?```', '', board_section_content, flags=re.DOTALL).strip()
         if remaining_text:
-            html_sections.append(render_section('Additional Information', remaining_text))
+            html_sections.append(partial(emit_section, title='Additional Information', content=remaining_text,
+                                         ctx=ctx))
     else:
         # Fall back to text-based board state
         for key in q_sections:
             if key in rendered:
                 continue
             if 'State' in key or 'Board' in key:
-                html_sections.append(render_section(key, q_sections[key]))
+                html_sections.append(partial(emit_section, title=key, content=q_sections[key], ctx=ctx))
                 rendered.add(key)
                 break
 
@@ -517,7 +635,7 @@ def render_puzzle(q_file: Path) -> str:
         if key.startswith('_'):
             continue
         if key == 'Hand' or key.startswith('Hand ') or key.startswith('Hand('):
-            html_sections.append(render_section(key, q_sections[key]))
+            html_sections.append(partial(emit_section, title=key, content=q_sections[key], ctx=ctx))
             rendered.add(key)
             break
 
@@ -528,20 +646,102 @@ def render_puzzle(q_file: Path) -> str:
         if key.startswith('_'):
             continue
         if key.startswith('Card Text'):
-            html_sections.append(render_appendix_section(key, q_sections[key]))
+            html_sections.append(partial(emit_appendix_section, title=key, content=q_sections[key], ctx=ctx))
             rendered.add(key)
             break
 
-    # Render answer section
-    answer_html = render_answer(a_content) if a_content else '<p>No answer file found.</p>'
+    def emit_sections(write):
+        for i, emit in enumerate(html_sections):
+            if i:
+                write('\n')
+            emit(write)
+
+    # Answer section; a lazily loaded answer is left for the page script to fetch
+    if a_content and ctx.answer_url:
+        answer = ''
+    elif a_content:
+        answer = partial(emit_answer, content=a_content, ctx=ctx)
+    else:
+        answer = '<p>No answer file found.</p>'
+
+    emit_page(write, problem_name, difficulty, emit_sections, answer, template, ctx)
+
+
+def render_puzzle(q_file: Path, cache_dir: Path | None = CACHE_DIR, ctx: RenderContext = PLAIN) -> str:
+    """Render a puzzle Q file (and its A file) to HTML."""
+    return collect(emit_puzzle, q_file, cache_dir, None, ctx)
+
+
+@dataclass(frozen=True, slots=True)
+class RenderOptions:
+    """Settings for render_markdown(); the defaults match a plain render_puzzles.py run.
+
+    Pages rendered in memory are self-contained, so the modes that write extra
+    files (mirror images, sprites, lazy answers, shared assets) are not offered.
+    """
+    image_source: str = 'nrdb'  # 'nrdb' or 'localhost'
+    card_lookup: dict | None = None  # {card name: code}; None uses card_lookup.json
+
+
+def render_markdown(question: str, answer: str = '', options: RenderOptions = RenderOptions(),
+                    name: str = 'puzzle') -> str:
+    """Render a puzzle from its question and answer markdown, without touching the filesystem.
+
+    name stands in for the page title when the question has no # title.
+    Safe to call from several threads at once; each render gets its own RenderContext.
+    Raises TimeoutError when a board block runs out of time (see board_yaml.py),
+    rather than returning a page without its board.
+    """
+    if options.image_source not in IMAGE_SOURCES or options.image_source == 'mirror':
+        raise ValueError(f"Unsupported image source for in-memory rendering: {options.image_source!r}")
+    q_puzzle = puzzle_cache.parse_puzzle(question)
+    if is_transient(q_puzzle):
+        raise TimeoutError(next(error for _, error in q_puzzle['yaml'].values() if error))
+    ctx = RenderContext(image_source=options.image_source, card_lookup=options.card_lookup)
+    return collect(emit_parsed_puzzle, q_puzzle, answer, name, None, ctx)
+
+
+def render_key(question: str, answer: str, options: RenderOptions, card_lookup_digest: str,
+               name: str = 'puzzle') -> str:
+    """Content hash of everything render_markdown() output depends on.
+
+    card_lookup_digest identifies the lookup the options render with (e.g. the
+    SHA-256 of the card_lookup.json options.card_lookup was loaded from).
+    """
+    inputs = json.dumps([question, answer, name, options.image_source, IMAGE_SOURCES[options.image_source],
+                         IMAGE_CONTEXTS, renderer_version(), card_lookup_digest])
+    return hashlib.sha256(inputs.encode()).hexdigest()
+
+
+def emit_page(write, title: str, difficulty: str, sections, answer, template: str | None = None,
+              ctx: RenderContext = PLAIN):
+    """Write the page template (default page_template(ctx)) filled with a puzzle's parts.
+
+    sections and answer are either text or emitters called with write when the
+    template reaches them.
+    """
+    fields = {
+        'title': title,
+        'difficulty': difficulty,
+        'difficulty_class': difficulty.lower(),
+        'sections': sections,
+        'answer': answer,
+        'answer_src': ctx.answer_url or '',
+    }
+    for literal, name in template_chunks(template or page_template(ctx)):
+        write(literal)
+        if name is not None:
+            value = fields[name]
+            if callable(value):
+                value(write)
+            else:
+                write(value)
 
-    return HTML_TEMPLATE.format(
-        title=problem_name,
-        difficulty=difficulty,
-        difficulty_class=difficulty.lower(),
-        sections='\n'.join(html_sections),
-        answer=answer_html
-    )
+
+@lru_cache(maxsize=None)
+def template_chunks(template: str) -> tuple:
+    """Split a str.format template once into (literal text, field name or None) pairs."""
+    return tuple((literal, field) for literal, field, _, _ in Formatter().parse(template))
 
 
 HTML_TEMPLATE = '''<!DOCTYPE html>
@@ -1026,7 +1226,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
 '''
 
 
-def render_index(puzzles: list) -> str:
+def render_index(puzzles: list, ctx: RenderContext = PLAIN) -> str:
     """Render index page."""
     rows = []
     for p in sorted(puzzles, key=lambda x: x['name']):
@@ -1037,7 +1237,10 @@ def render_index(puzzles: list) -> str:
                 <td>{p['side']}</td>
             </tr>''')
 
-    return f'''<!DOCTYPE html>
+    return index_template(ctx).format(rows=''.join(rows))
+
+
+INDEX_TEMPLATE = '''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -1119,7 +1322,7 @@ def render_index(puzzles: list) -> str:
                 </tr>
             </thead>
             <tbody>
-                {''.join(rows)}
+                {rows}
             </tbody>
         </table>
     </div>
@@ -1128,52 +1331,450 @@ def render_index(puzzles: list) -> str:
 '''
 
 
+# Extra page CSS for --sprites; the sizes match IMAGE_CONTEXTS like the img rules
+SPRITE_STYLE = '''
+        /* Card images drawn from the page's sprite sheets */
+        .sprite {{
+            display: inline-block;
+            background-repeat: no-repeat;
+            background-origin: border-box;
+        }}
+
+        .board-card .sprite {{
+            display: block;
+            width: 100px;
+            height: 140px;
+            border-radius: 4px;
+            border: 2px solid transparent;
+        }}
+
+        .board-card.rezzed .sprite {{
+            border-color: var(--accent-corp);
+        }}
+
+        .card-ref .sprite {{
+            width: 129px;
+            height: 180px;
+            border-radius: 6px;
+            vertical-align: middle;
+            cursor: pointer;
+            transition: transform 0.2s ease;
+        }}
+
+        .card-ref:hover .sprite {{
+            transform: scale(2);
+            z-index: 1000;
+            position: relative;
+            box-shadow: 0 8px 32px rgba(0,0,0,0.6);
+        }}
+'''
+
+# Page script for --lazy-answers: the first "Show Answer" fetches the fragment
+# named by the answer div's data-src (empty when there is no answer file)
+LAZY_ANSWER_SCRIPT = '''        async function toggleAnswer() {{
+            const answer = document.getElementById('answer');
+            const btn = document.querySelector('.answer-toggle');
+            if (answer.dataset.src) {{
+                btn.disabled = true;
+                const response = await fetch(answer.dataset.src).catch(() => null);
+                btn.disabled = false;
+                if (!response || !response.ok) {{
+                    btn.textContent = 'Could not load the answer, try again';
+                    return;
+                }}
+                answer.innerHTML = await response.text();
+                delete answer.dataset.src;
+            }}
+            answer.classList.toggle('visible');
+            btn.textContent = answer.classList.contains('visible') ? 'Hide Answer' : 'Show Answer';
+        }}
+'''
+
+
+STYLE_BLOCK = re.compile(r'    <style>\n(.*?)    </style>\n', re.DOTALL)
+SCRIPT_BLOCK = re.compile(r'    <script>\n(.*?)    </script>\n', re.DOTALL)
+
+
+@lru_cache(maxsize=None)
+def puzzle_template(sprites: bool, lazy_answers: bool) -> str:
+    """HTML_TEMPLATE plus the CSS, markup and script that --sprites and --lazy-answers need."""
+    template = HTML_TEMPLATE
+    if sprites:
+        template = template.replace('    </style>', SPRITE_STYLE + '    </style>', 1)
+    if lazy_answers:
+        template = template.replace('id="answer">', 'id="answer" data-src="{answer_src}">', 1)
+        template = SCRIPT_BLOCK.sub(lambda m: f'    <script>\n{LAZY_ANSWER_SCRIPT}    </script>\n', template, 1)
+    return template
+
+
+@lru_cache(maxsize=None)
+def link_assets(template: str, name: str) -> tuple[str, dict]:
+    """Move a template's inline <style>/<script> blocks out into asset files.
+
+    Returns the template with <link>/<script src> tags in their place, and
+    {path under html/: text} for the assets. File names carry a hash of their
+    content, so browsers can cache them forever and an edit gets a new name.
+    """
+    assets = {}
+
+    def extract(m: re.Match, ext: str, tag: str) -> str:
+        text = m.group(1).replace('{{', '{').replace('}}', '}')
+        path = f"assets/{name}.{hashlib.sha256(text.encode()).hexdigest()[:12]}.{ext}"
+        assets[path] = text
+        return tag.format(path)
+
+    template = STYLE_BLOCK.sub(
+        lambda m: extract(m, 'css', '    <link rel="stylesheet" href="{}">\n'), template)
+    template = SCRIPT_BLOCK.sub(
+        lambda m: extract(m, 'js', '    <script src="{}"></script>\n'), template)
+    return template, assets
+
+
+def page_template(ctx: RenderContext = PLAIN) -> str:
+    """puzzle_template() for ctx's modes, with its CSS/JS linked rather
+    than inlined under --shared-assets."""
+    template = puzzle_template(ctx.sprites, ctx.lazy_answers)
+    return link_assets(template, 'puzzle')[0] if ctx.shared_assets else template
+
+
+def index_template(ctx: RenderContext = PLAIN) -> str:
+    """INDEX_TEMPLATE (the search page under --search), with its CSS/JS linked
+    rather than inlined under --shared-assets."""
+    template = search_index.SEARCH_TEMPLATE if ctx.search else INDEX_TEMPLATE
+    return link_assets(template, 'index')[0] if ctx.shared_assets else template
+
+
+def write_assets(ctx: RenderContext) -> set:
+    """Write the shared CSS/JS files that are missing, return every current asset path."""
+    template = puzzle_template(ctx.sprites, ctx.lazy_answers)
+    index = search_index.SEARCH_TEMPLATE if ctx.search else INDEX_TEMPLATE
+    assets = {**link_assets(template, 'puzzle')[1], **link_assets(index, 'index')[1]}
+    ASSETS_DIR.mkdir(exist_ok=True)
+    for path, text in assets.items():
+        if not (HTML_DIR / path).exists():
+            write_atomic(HTML_DIR / path, text)
+    return set(assets)
+
+
+def prune_dir(directory: Path, keep: set):
+    """Delete the files in directory whose path under HTML_DIR is not in keep.
+
+    The .gz/.br siblings compress_site.py writes go with the file they compress.
+    """
+    directory.mkdir(exist_ok=True)
+    for path in directory.iterdir():
+        kept = path.with_suffix('') if path.suffix in ('.gz', '.br') else path
+        if kept.relative_to(HTML_DIR).as_posix() not in keep:
+            path.unlink()
+
+
+@lru_cache(maxsize=None)
+def renderer_version() -> str:
+    """Short hash of the renderer's own sources, so code and template edits invalidate every page."""
+    digest = hashlib.sha256()
+    for source in RENDERER_SOURCES:
+        digest.update(source.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def image_config_version(image_source: str) -> str:
+    """The image source plus a short hash of its variants and display sizes."""
+    config = json.dumps([IMAGE_SOURCES[image_source], IMAGE_CONTEXTS], sort_keys=True)
+    if image_source == 'mirror':
+        config += file_digest(image_mirror.INDEX_FILE) or ''
+    return f"{image_source}-{hashlib.sha256(config.encode()).hexdigest()[:12]}"
+
+
+def puzzle_inputs(q_file: Path, cards_digest: str, ctx: RenderContext) -> dict:
+    """Everything a rendered puzzle page depends on, as content hashes.
+
+    cards_digest covers the card lookup entries of the cards the puzzle uses
+    (see card_deps.cards_digest), so a lookup edit re-renders only their pages.
+    """
+    return {
+        'q': file_digest(q_file),
+        'a': file_digest(answer_file_for(q_file)),
+        'cards': cards_digest,
+        'renderer': renderer_version(),
+        'images': image_config_version(ctx.image_source),
+        'shared_assets': ctx.shared_assets,
+        'sprites': ctx.sprites,
+        'lazy_answers': ctx.lazy_answers,
+        'search': ctx.search,
+    }
+
+
+def load_manifest() -> dict:
+    """Load the build manifest, or an empty one if missing/corrupt."""
+    try:
+        manifest = json.loads(MANIFEST_FILE.read_text())
+    except (OSError, ValueError):
+        return {'pages': {}}
+    if not isinstance(manifest.get('pages'), dict):
+        return {'pages': {}}
+    return manifest
+
+
+def save_manifest(manifest: dict):
+    """Write the build manifest, which every build refreshes."""
+    write_atomic(MANIFEST_FILE, json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def puzzle_metadata(q_file: Path) -> dict:
+    """Index metadata for a puzzle: page name, file name, difficulty and side."""
+    name = q_file.stem.replace('-q', '')
+
+    # Extract difficulty and side from content
+    content = q_file.read_text()
+    diff_match = re.search(r'\[(Easy|Medium|Hard)\]', content)
+    difficulty = diff_match.group(1) if diff_match else 'Unknown'
+    side = 'Corp' if 'corp' in name else 'Runner'
+
+    return {
+        'name': name,
+        'filename': f"{name}.html",
+        'difficulty': difficulty,
+        'side': side
+    }
+
+
+def build_puzzle_page(q_file: Path, site: RenderContext, cache_dir: Path | None) -> dict:
+    """Render one puzzle page (and its sprite sheets and answer fragment) into
+    HTML_DIR and return its index metadata, with search tokens under --search.
+
+    site holds the build's modes (see build_site); the page renders with its
+    own copy. Runs inside worker processes for --jobs, so everything it needs
+    is passed in. A page whose board ran out of time to parse is marked
+    'transient', so the build does not record it as up to date.
+    """
+    puzzle = puzzle_metadata(q_file)
+    name = puzzle['name']
+    q_puzzle = load_puzzle(q_file, cache_dir)
+    a_file = answer_file_for(q_file)
+    a_content = a_file.read_text() if a_file.exists() else ''
+    lookup = site.card_lookup if site.card_lookup is not None else load_card_lookup()
+
+    # Files only this page uses are named with a hash of its inputs, so
+    # browsers never pair a new page with an old sheet or answer
+    version = None
+    if site.sprites or site.lazy_answers:
+        cards = card_deps.puzzle_cards(q_puzzle, a_content)
+        cards_digest = card_deps.cards_digest(cards, lookup)
+        inputs = json.dumps(puzzle_inputs(q_file, cards_digest, site), sort_keys=True)
+        version = hashlib.sha256(inputs.encode()).hexdigest()[:12]
+    ctx = replace(site, card_lookup=lookup, page_sprites={}, mirror_files=set(),
+                  sprite_url=f"sprites/{name}-{{}}.{version}.webp" if site.sprites else None,
+                  answer_url=f"answers/{name}.{version}.html" if site.lazy_answers and a_file.exists() else None)
+
+    # Render and save
+    stream_atomic(HTML_DIR / f"{name}.html", emit_parsed_puzzle, q_puzzle, a_content, q_file.stem, None, ctx)
+    if ctx.answer_url:
+        ANSWERS_DIR.mkdir(exist_ok=True)
+        stream_atomic(HTML_DIR / ctx.answer_url, emit_answer, a_content, ctx)
+        puzzle['answer'] = ctx.answer_url
+
+    if ctx.search:
+        puzzle['category'] = search_index.category(name)
+        puzzle['tokens'] = search_index.puzzle_tokens(puzzle, q_puzzle)
+    if is_transient(q_puzzle):
+        puzzle['transient'] = True
+    if ctx.image_source == 'mirror':
+        puzzle['images'] = sorted(ctx.mirror_files)
+    if ctx.sprites:
+        puzzle['sprites'] = []
+        for context, cells in ctx.page_sprites.items():
+            path = ctx.sprite_url.format(context)
+            image_mirror.compose_sprite_sheet(list(cells), sprite_cell(context), SPRITE_COLUMNS, HTML_DIR / path)
+            puzzle['sprites'].append(path)
+    return puzzle
+
+
+def instrument_stages() -> StageProfile:
+    """Wrap the functions behind each render stage for --profile."""
+    stages = StageProfile()
+    module = sys.modules[__name__]
+    stages.instrument_reads()
+    stages.instrument(puzzle_cache, 'parse_sections', 'section parse', size=len)
+    stages.instrument(module, 'parse_markdown_sections', 'section parse', size=len)
+    stages.instrument(puzzle_cache, 'extract_yaml', 'YAML parse', size=len)
+    stages.instrument(module, 'emit_board', 'board render', stream=True)
+    stages.instrument(module, 'emit_section', 'section render', stream=True)
+    stages.instrument(module, 'emit_appendix_section', 'section render', stream=True)
+    stages.instrument(module, 'emit_page', 'template format', stream=True)
+    stages.instrument(module, 'render_index', 'template format')
+    stages.instrument(module, 'write_atomic', 'write', size=lambda path, text: len(text))
+    stages.instrument(module, 'stream_atomic', 'write', size=lambda path, *_: path.stat().st_size)
+    return stages
+
+
 def main():
-    global IMAGE_SOURCE
-    
     # Parse command line arguments
     import argparse
     parser = argparse.ArgumentParser(description='Render Netrunner puzzle markdown files to HTML.')
-    parser.add_argument('--images', choices=['nrdb', 'localhost'], default='nrdb',
-                        help='Image source: nrdb (NetrunnerDB CDN) or localhost (local Jinteki)')
+    parser.add_argument('--images', choices=['nrdb', 'localhost', 'mirror'], default='nrdb',
+                        help='Image source: nrdb (NetrunnerDB CDN), localhost (local Jinteki) '
+                             'or mirror (offline copies from image_mirror.py, linked into html/img/)')
+    parser.add_argument('--sprites', action='store_true',
+                        help='With --images mirror, draw each page\'s cards from one sprite sheet per '
+                             'image size in html/sprites/ instead of one request per card (needs Pillow)')
+    parser.add_argument('--lazy-answers', action='store_true',
+                        help='Write answers to html/answers/ and fetch them on "Show Answer" instead of '
+                             'embedding them (the site must then be served over HTTP)')
+    parser.add_argument('--search', action='store_true',
+                        help='Make index.html a paginated page searching a prebuilt html/search-index.json '
+                             '(the site must then be served over HTTP)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only re-render pages whose inputs changed since the last build '
+                             '(tracked in html/.render-manifest.json) and remove orphaned pages')
+    parser.add_argument('--compress', action='store_true',
+                        help='Minify the output and write .gz/.br siblings of changed files (see compress_site.py)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Render puzzles across N worker processes (0 = one per CPU)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Parse puzzles without the shared parsed-puzzle cache ({CACHE_DIR.name}/)')
+    parser.add_argument('--shared-assets', action='store_true',
+                        help='Link content-hashed CSS/JS files in html/assets/ instead of inlining them in every page')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print wall time, calls and bytes per stage (read, parse, render, format, write)')
+    parser.add_argument('--pstats', type=Path, metavar='FILE',
+                        help='Dump cProfile stats for the run to FILE')
     args = parser.parse_args()
+    if args.sprites:
+        if args.images != 'mirror':
+            parser.error('--sprites needs --images mirror')
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            parser.error('--sprites needs Pillow to compose sprite sheets')
     
-    IMAGE_SOURCE = args.images
-    print(f"Using image source: {IMAGE_SOURCE} ({IMAGE_SOURCES[IMAGE_SOURCE]['base']})")
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    if not (args.profile or args.pstats):
+        build_site(args)
+        return
+
+    # Workers' time would be invisible to the profilers, so render in-process
+    if args.jobs > 1:
+        print("Profiling: ignoring --jobs, rendering in-process")
+        args.jobs = 1
+    run_profiled(lambda: build_site(args), instrument_stages() if args.profile else None, args.pstats)
+
+
+def build_site(args):
+    """Render every stale puzzle page and the index, as configured by main()'s flags."""
+    site = RenderContext(image_source=args.images, shared_assets=args.shared_assets, sprites=args.sprites,
+                         lazy_answers=args.lazy_answers, search=args.search)
+    print(f"Using image source: {site.image_source} ({IMAGE_SOURCES[site.image_source]['base']})")
     
     # Ensure output directory exists
     HTML_DIR.mkdir(exist_ok=True)
 
-    puzzles = []
-
-    # Find all question files
-    for q_file in sorted(PROBLEMS_DIR.glob('*-q.md')):
-        name = q_file.stem.replace('-q', '')
-        print(f"Rendering {name}...")
-
-        # Extract difficulty and side from content
-        content = q_file.read_text()
-        diff_match = re.search(r'\[(Easy|Medium|Hard)\]', content)
-        difficulty = diff_match.group(1) if diff_match else 'Unknown'
-        side = 'Corp' if 'corp' in name else 'Runner'
-
-        # Render and save
-        html = render_puzzle(q_file)
-        out_file = HTML_DIR / f"{name}.html"
-        out_file.write_text(html)
-
-        puzzles.append({
-            'name': name,
-            'filename': f"{name}.html",
-            'difficulty': difficulty,
-            'side': side
-        })
-
-    # Render index
-    index_html = render_index(puzzles)
-    (HTML_DIR / 'index.html').write_text(index_html)
+    if site.shared_assets:
+        # Assets are immutable by name; drop the ones no template refers to any more
+        assets = write_assets(site)
+        prune_dir(ASSETS_DIR, assets)
+        print(f"Shared assets: {', '.join(sorted(assets))}")
+
+    # Every build records what it rendered, so a later --incremental build
+    # never trusts pages a full build has since replaced
+    old_manifest = load_manifest()
+    old_pages = old_manifest['pages']
+    new_pages = {}
+
+    # Find all question files; decide which pages need rendering
+    q_files = sorted(PROBLEMS_DIR.glob('*-q.md'))
+    # Pages depend on the lookup entries of the cards they use, not the whole lookup
+    deps = card_deps.load_deps(q_files, None if args.no_cache else CACHE_DIR)
+    lookup = load_card_lookup()
+    stale = []
+    for q_file in q_files:
+        out_name = f"{q_file.stem.replace('-q', '')}.html"
+        cards_digest = card_deps.cards_digest(deps[str(q_file.resolve())], lookup)
+        inputs = puzzle_inputs(q_file, cards_digest, site)
+
+        previous = old_pages.get(out_name) if args.incremental else None
+        if previous and previous.get('inputs') == inputs and (HTML_DIR / out_name).exists():
+            new_pages[out_name] = previous
+        else:
+            stale.append((q_file, inputs))
+
+    for q_file, _ in stale:
+        print(f"Rendering {q_file.stem.replace('-q', '')}...")
+
+    # Render stale pages, fanned out across worker processes with --jobs
+    stale_files = [q_file for q_file, _ in stale]
+    sites = [site] * len(stale_files)
+    cache_dirs = [None if args.no_cache else CACHE_DIR] * len(stale_files)
+    if args.jobs > 1 and len(stale_files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, len(stale_files) // (args.jobs * 4))
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(build_puzzle_page, stale_files, sites, cache_dirs, chunksize=chunksize))
+    else:
+        results = list(map(build_puzzle_page, stale_files, sites, cache_dirs))
+
+    for (_, inputs), puzzle in zip(stale, results):
+        if puzzle.pop('transient', False):
+            print(f"Board of {puzzle['name']} timed out; it will be rendered again next build")
+            inputs = None
+        new_pages[puzzle['filename']] = {'inputs': inputs, 'puzzle': puzzle}
+
+    # Index metadata comes from the manifest or the workers, in source order
+    puzzles = [new_pages[f"{q_file.stem.replace('-q', '')}.html"]['puzzle'] for q_file in q_files]
+    rendered_count = len(results)
+
+    if site.image_source == 'mirror':
+        # Link exactly the mirror files the pages use; unused ones are dropped
+        used = set().union(*(p.get('images', ()) for p in puzzles))
+        added = image_mirror.publish(used, MIRROR_IMAGES_DIR)
+        print(f"Mirror images: {len(used)} in {MIRROR_IMAGES_DIR} ({added} added)")
+
+    if site.sprites:
+        # Sheets are named by page inputs; drop those no current page uses
+        sheets = set().union(*(p.get('sprites', ()) for p in puzzles))
+        prune_dir(SPRITES_DIR, sheets)
+        print(f"Sprite sheets: {len(sheets)} in {SPRITES_DIR}")
+
+    if site.lazy_answers:
+        # Fragments are named by page inputs; drop those no current page uses
+        prune_dir(ANSWERS_DIR, {p['answer'] for p in puzzles if 'answer' in p})
+
+    # Remove pages whose source puzzle is gone
+    orphans = sorted(set(old_pages) - set(new_pages))
+    for out_name in orphans:
+        (HTML_DIR / out_name).unlink(missing_ok=True)
+        print(f"Removed orphaned {out_name}")
+
+    # Render index (the puzzle list is tiny, so it is cheap to rebuild every time)
+    if site.search:
+        index_json = json.dumps(search_index.build_index(puzzles), separators=(',', ':'))
+        if file_digest(SEARCH_INDEX_FILE) != hashlib.sha256(index_json.encode()).hexdigest():
+            write_atomic(SEARCH_INDEX_FILE, index_json)
+        # The query string changes with the content, so browsers refetch it only after an edit
+        index_url = f"{SEARCH_INDEX_FILE.name}?v={file_digest(SEARCH_INDEX_FILE)[:12]}"
+        index_html = index_template(site).format(index_url=index_url)
+        print(f"Search index: {len(index_json) / 1024:.1f} KB for {len(puzzles)} puzzles")
+    else:
+        index_html = render_index(puzzles, site)
+    # Compared by the digest as rendered, since --compress minifies the file on disk
+    index_file = HTML_DIR / 'index.html'
+    index_digest = hashlib.sha256(index_html.encode()).hexdigest()
+    if not (args.incremental and index_file.exists() and old_manifest.get('index') == index_digest):
+        write_atomic(index_file, index_html)
+
+    save_manifest({'pages': new_pages, 'index': index_digest})
+    pruned = 0 if args.no_cache else puzzle_cache.prune_cache(CACHE_DIR)
+    if pruned:
+        print(f"Pruned {pruned} stale entries from {CACHE_DIR.name}/")
+    if args.incremental:
+        print(f"\nGenerated {rendered_count} of {len(puzzles)} puzzle pages "
+              f"({len(puzzles) - rendered_count} up to date, {len(orphans)} removed) + index")
+    else:
+        print(f"\nGenerated {len(puzzles)} puzzle pages + index")
 
-    print(f"\nGenerated {len(puzzles)} puzzle pages + index")
+    if args.compress:
+        import compress_site
+        print(f"\n{compress_site.report(compress_site.compress_site(HTML_DIR))}")
     print(f"Open: {HTML_DIR / 'index.html'}")
 
 
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Local HTTP service that renders puzzles on demand, for authoring previews.
+Usage: python render_service.py [--host HOST] [--port N] [--images nrdb|localhost] [--cache-size N]
+
+    POST /render        JSON {"question": md, "answer": md, "name": str, "images": str},
+                        only "question" required; returns the rendered page
+    GET  /<name>.html   problems/<name>-q.md (and its -a.md) as currently on disk
+    GET  /              the puzzle index
+    GET  /stats         cache counters as JSON
+
+Pages are rendered in memory by render_puzzles.render_markdown(), nothing is
+written to html/, and requests render concurrently. Each response carries an
+ETag that is the content hash of everything the page depends on
+(render_puzzles.render_key), and rendered pages are kept in an LRU cache under
+that hash. A request whose If-None-Match matches gets 304 without rendering
+anything; an edit changes the hash, so a stale page is never served. Pages
+render with the card lookup the hash was taken from, reloaded whenever
+card_lookup.json changes. bench_service.py load-tests a running service.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from card_index import CARD_LOOKUP_FILE
+from common import answer_file_for
+from render_puzzles import (IMAGE_SOURCES, PROBLEMS_DIR, RenderOptions, puzzle_metadata,
+                            render_index, render_key, render_markdown)
+
+DEFAULT_PORT = 8042
+DEFAULT_CACHE_SIZE = 512
+
+# Largest POST /render body accepted
+MAX_BODY = 1024 * 1024
+
+
+class PageCache:
+    """Thread-safe LRU of rendered pages by render key, with hit/miss counters."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0, 'render_seconds': 0.0}
+
+    def count(self, name: str, amount: float = 1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            page = self.pages.get(key)
+            if page is not None:
+                self.pages.move_to_end(key)
+            return page
+
+    def put(self, key: str, page: bytes):
+        with self.lock:
+            self.pages[key] = page
+            self.pages.move_to_end(key)
+            while len(self.pages) > self.size:
+                self.pages.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {**self.stats, 'entries': len(self.pages), 'size': self.size}
+
+
+class CardLookup:
+    """(SHA-256, {card name: code}) of CARD_LOOKUP_FILE, reloaded only when its size or mtime changes.
+
+    Both come from one read of the file, so a page is always rendered with
+    the lookup its render key was taken from.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.snapshot = None
+
+    def __call__(self) -> tuple[str, dict]:
+        st = CARD_LOOKUP_FILE.stat()
+        with self.lock:
+            if self.stamp != (st.st_size, st.st_mtime_ns):
+                data = CARD_LOOKUP_FILE.read_bytes()
+                self.stamp = st.st_size, st.st_mtime_ns
+                self.snapshot = hashlib.sha256(data).hexdigest(), json.loads(data)
+            return self.snapshot
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so previews reuse one connection
+    server_version = 'NetrunnerRender/1'
+    # Headers and body go out as separate writes; without this each reply waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    # Set by serve()
+    cache: PageCache
+    card_lookup: CardLookup
+    image_source: str
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def send_body(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_text(self, status: int, message: str):
+        self.send_body(status, f"{message}\n".encode(), 'text/plain; charset=utf-8')
+
+    def send_page(self, question: str, answer: str, image_source: str, name: str):
+        """Answer with the rendered page: 304 on a matching ETag, else from the cache or a fresh render."""
+        lookup_digest, lookup = self.card_lookup()
+        options = RenderOptions(image_source, lookup)
+        key = render_key(question, answer, options, lookup_digest, name)
+        etag = f'"{key}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in (tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')):
+            self.cache.count('not_modified')
+            self.send_response(304)
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.end_headers()
+            return
+
+        page = self.cache.get(key)
+        if page is not None:
+            self.cache.count('hits')
+            headers['X-Cache'] = 'hit'
+        else:
+            start = time.perf_counter()
+            try:
+                page = render_markdown(question, answer, options, name).encode()
+            except TimeoutError as e:  # Load, not the draft: nothing is cached, a retry may succeed
+                self.send_error_text(503, f"Render timed out: {e}")
+                return
+            except Exception as e:  # A broken draft must not take the preview down
+                self.send_error_text(500, f"Render failed: {type(e).__name__}: {e}")
+                return
+            self.cache.count('render_seconds', time.perf_counter() - start)
+            self.cache.count('misses')
+            self.cache.put(key, page)
+            headers['X-Cache'] = 'miss'
+        self.send_body(200, page, 'text/html; charset=utf-8', headers)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/stats':
+            self.send_body(200, json.dumps(self.cache.snapshot()).encode(), 'application/json')
+        elif path in ('/', '/index.html'):
+            puzzles = [puzzle_metadata(q_file) for q_file in sorted(PROBLEMS_DIR.glob('*-q.md'))]
+            self.send_body(200, render_index(puzzles).encode(), 'text/html; charset=utf-8')
+        elif path.endswith('.html') and '/' not in path[1:]:
+            name = path[1:-len('.html')]
+            q_file = PROBLEMS_DIR / f"{name}-q.md"
+            if not q_file.exists():
+                self.send_error_text(404, f"No puzzle {name}")
+                return
+            a_file = answer_file_for(q_file)
+            answer = a_file.read_text() if a_file.exists() else ''
+            self.send_page(q_file.read_text(), answer, self.image_source, q_file.stem)
+        else:
+            self.send_error_text(404, f"Not found: {path}")
+
+    def do_POST(self):
+        if self.path.split('?')[0] != '/render':
+            self.send_error_text(404, f"Not found: {self.path}")
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            self.send_error_text(413, f"Body over {MAX_BODY} bytes")
+            self.close_connection = True
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            question = request['question']
+            answer = request.get('answer') or ''
+            name = request.get('name') or 'puzzle'
+            image_source = request.get('images') or self.image_source
+            if not all(isinstance(value, str) for value in (question, answer, name, image_source)):
+                raise TypeError('question, answer, name and images must be strings')
+            if image_source not in IMAGE_SOURCES or image_source == 'mirror':
+                raise ValueError(f"unsupported images {image_source!r}")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.send_error_text(400, f"Bad render request: {e}")
+            return
+        self.send_page(question, answer, image_source, name)
+
+
+def serve(host: str = '127.0.0.1', port: int = DEFAULT_PORT, image_source: str = 'nrdb',
+          cache_size: int = DEFAULT_CACHE_SIZE, quiet: bool = False) -> ThreadingHTTPServer:
+    """A server ready for serve_forever(); port 0 picks a free port (see server.server_address)."""
+    handler = type('Handler', (RenderHandler,), {
+        'cache': PageCache(cache_size),
+        'card_lookup': CardLookup(),
+        'image_source': image_source,
+        'quiet': quiet,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Render puzzles on demand over HTTP, for authoring previews.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--images', choices=['nrdb', 'localhost'], default='nrdb',
+                        help='Default image source: nrdb (NetrunnerDB CDN) or localhost (local Jinteki)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, metavar='N',
+                        help=f'Rendered pages kept in memory (default: {DEFAULT_CACHE_SIZE})')
+    parser.add_argument('--quiet', action='store_true', help='Do not log each request')
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.images, args.cache_size, args.quiet)
+    host, port = server.server_address[:2]
+    print(f"Rendering puzzles at http://{host}:{port}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{json.dumps(server.RequestHandlerClass.cache.snapshot())}")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
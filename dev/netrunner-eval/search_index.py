@@ -0,0 +1,287 @@
+"""
+Prebuilt search index and paginated index page for render_puzzles.py --search.
+
+Each puzzle contributes tokens from its title, context, card names, category,
+side and difficulty (puzzle_tokens). build_index() turns every puzzle's
+tokens into the compact search-index.json:
+
+    puzzles      [[name, difficulty, side, category], ...] sorted by name,
+                 the last three as indexes into the tables below
+    difficulties, sides, categories
+    tokens       sorted token list
+    postings     per token, the ids of the puzzles holding it, delta-encoded
+
+SEARCH_TEMPLATE loads it once and then answers queries in the browser: each
+query word matches every token it is a prefix of (found by binary search), the
+words' matches are intersected, the filters applied, and only one page of
+rows is ever put in the DOM.
+"""
+
+import re
+
+from board_model import parse_board
+from card_index import fold
+from common import CARD_REF
+from puzzle_cache import puzzle_board
+
+WORD = re.compile(r'[a-z0-9]+')
+
+# Too common in puzzle text to narrow a search
+STOPWORDS = frozenset('a an and are as at be by for from has have in is it its of on or that the this to was '
+                      'with you your'.split())
+
+
+def tokenize(text: str) -> set:
+    """Search words in text, folded as foldText() in SEARCH_TEMPLATE folds queries."""
+    return set(WORD.findall(fold(text))) - STOPWORDS
+
+
+def category(name: str) -> str:
+    """A puzzle's category: its name up to the first '-' (breach-001-runner -> breach)."""
+    return name.split('-')[0]
+
+
+def puzzle_tokens(puzzle: dict, q_puzzle: dict) -> list:
+    """Sorted search tokens for a puzzle, given its index metadata and parsed question file."""
+    sections = q_puzzle['sections']
+    texts = [sections.get('_title', ''), puzzle['name'], puzzle['category'], puzzle['side'], puzzle['difficulty']]
+    texts += [value for key, value in sections.items() if key in ('Situation', 'Context')]
+    texts += CARD_REF.findall('\n'.join(sections.values()))
+    board_data = puzzle_board(q_puzzle)
+    if board_data:
+        texts += [card.name for card in parse_board(board_data).cards()]
+    return sorted(set().union(*map(tokenize, texts)))
+
+
+def build_index(puzzles: list) -> dict:
+    """search-index.json's content for puzzles (index metadata with 'category' and 'tokens')."""
+    puzzles = sorted(puzzles, key=lambda p: p['name'])
+    tables = {field: sorted({p[field] for p in puzzles}) for field in ('difficulty', 'side', 'category')}
+    rows = [[p['name'], *(tables[field].index(p[field]) for field in tables)] for p in puzzles]
+
+    holders = {}
+    for i, p in enumerate(puzzles):
+        for token in p['tokens']:
+            holders.setdefault(token, []).append(i)
+    tokens = sorted(holders)
+    postings = []
+    for token in tokens:
+        ids = holders[token]
+        postings.append([ids[0]] + [b - a for a, b in zip(ids, ids[1:])])
+
+    return {
+        'puzzles': rows,
+        'difficulties': tables['difficulty'],
+        'sides': tables['side'],
+        'categories': tables['category'],
+        'tokens': tokens,
+        'postings': postings,
+    }
+
+
+SEARCH_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Netrunner Puzzles</title>
+    <style>
+        :root {{
+            --bg-primary: #1a1a2e;
+            --bg-secondary: #16213e;
+            --text-primary: #eee;
+            --text-secondary: #aaa;
+            --border-color: #333;
+        }}
+
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            background: var(--bg-primary);
+            color: var(--text-primary);
+            line-height: 1.6;
+            margin: 0;
+            padding: 40px 20px;
+        }}
+
+        .container {{
+            max-width: 800px;
+            margin: 0 auto;
+        }}
+
+        h1 {{
+            margin-bottom: 30px;
+        }}
+
+        .search {{
+            display: flex;
+            gap: 10px;
+            flex-wrap: wrap;
+            margin-bottom: 20px;
+        }}
+
+        .search input, .search select, .pager button {{
+            background: var(--bg-secondary);
+            color: var(--text-primary);
+            border: 1px solid var(--border-color);
+            border-radius: 4px;
+            padding: 8px 12px;
+            font-size: 1rem;
+        }}
+
+        .search input {{
+            flex: 1;
+            min-width: 200px;
+        }}
+
+        table {{
+            width: 100%;
+            border-collapse: collapse;
+        }}
+
+        th, td {{
+            text-align: left;
+            padding: 12px 15px;
+            border-bottom: 1px solid var(--border-color);
+        }}
+
+        th {{
+            color: var(--text-secondary);
+            font-weight: 600;
+        }}
+
+        a {{
+            color: #6eb5ff;
+            text-decoration: none;
+        }}
+
+        a:hover {{
+            text-decoration: underline;
+        }}
+
+        .difficulty {{
+            display: inline-block;
+            padding: 2px 10px;
+            border-radius: 4px;
+            font-size: 0.8rem;
+        }}
+
+        .difficulty.easy {{ background: #2d5a27; color: #8fdf82; }}
+        .difficulty.medium {{ background: #5a4a27; color: #dfcf82; }}
+        .difficulty.hard {{ background: #5a2727; color: #df8282; }}
+
+        .pager {{
+            display: flex;
+            gap: 15px;
+            align-items: center;
+            justify-content: center;
+            margin-top: 20px;
+            color: var(--text-secondary);
+        }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Netrunner Puzzles</h1>
+        <div class="search">
+            <input type="search" id="query" placeholder="Search titles, context, cards..." autofocus>
+            <select id="difficulty"><option value="">Any difficulty</option></select>
+            <select id="side"><option value="">Any side</option></select>
+            <select id="category"><option value="">Any category</option></select>
+        </div>
+        <table>
+            <thead>
+                <tr>
+                    <th>Puzzle</th>
+                    <th>Difficulty</th>
+                    <th>Side</th>
+                </tr>
+            </thead>
+            <tbody id="rows" data-index="{index_url}"></tbody>
+        </table>
+        <div class="pager">
+            <button id="prev">Previous</button>
+            <span id="status">Loading...</span>
+            <button id="next">Next</button>
+        </div>
+        <noscript>Searching the puzzle list needs JavaScript.</noscript>
+    </div>
+
+    <script>
+        const PAGE_SIZE = 50;
+        let index = null;
+        let matches = [];
+        let page = 0;
+
+        function foldText(text) {{
+            return text.normalize('NFKD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase();
+        }}
+
+        // Ids of puzzles holding any token that starts with prefix
+        function prefixMatches(prefix) {{
+            const tokens = index.tokens;
+            let lo = 0, hi = tokens.length;
+            while (lo < hi) {{
+                const mid = (lo + hi) >> 1;
+                if (tokens[mid] < prefix) lo = mid + 1; else hi = mid;
+            }}
+            const ids = new Set();
+            for (let t = lo; t < tokens.length && tokens[t].startsWith(prefix); t++) {{
+                let id = 0;
+                for (const delta of index.postings[t]) ids.add(id += delta);
+            }}
+            return ids;
+        }}
+
+        function search() {{
+            const words = foldText(document.getElementById('query').value).match(/[a-z0-9]+/g) || [];
+            let ids = null;
+            for (const word of words) {{
+                const found = prefixMatches(word);
+                ids = ids === null ? found : new Set([...ids].filter(id => found.has(id)));
+            }}
+            const filters = ['difficulty', 'side', 'category'].map(f => document.getElementById(f).value);
+            matches = [];
+            index.puzzles.forEach((row, id) => {{
+                if ((ids === null || ids.has(id)) &&
+                    filters.every((value, i) => value === '' || String(row[i + 1]) === value)) {{
+                    matches.push(row);
+                }}
+            }});
+            page = 0;
+            show();
+        }}
+
+        function show() {{
+            const pages = Math.max(1, Math.ceil(matches.length / PAGE_SIZE));
+            document.getElementById('rows').innerHTML = matches.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)
+                .map(([name, difficulty, side]) => {{
+                    const level = index.difficulties[difficulty];
+                    return `<tr><td><a href="${{name}}.html">${{name}}</a></td>` +
+                           `<td><span class="difficulty ${{level.toLowerCase()}}">${{level}}</span></td>` +
+                           `<td>${{index.sides[side]}}</td></tr>`;
+                }}).join('');
+            document.getElementById('status').textContent =
+                `${{matches.length}} puzzles · page ${{page + 1}} of ${{pages}}`;
+            document.getElementById('prev').disabled = page === 0;
+            document.getElementById('next').disabled = page >= pages - 1;
+        }}
+
+        document.getElementById('prev').onclick = () => {{ page--; show(); }};
+        document.getElementById('next').onclick = () => {{ page++; show(); }};
+
+        // The URL is in the markup, so the script can live in a shared asset
+        fetch(document.getElementById('rows').dataset.index).then(response => response.json()).then(data => {{
+            index = data;
+            for (const [field, values] of [['difficulty', data.difficulties], ['side', data.sides],
+                                           ['category', data.categories]]) {{
+                const select = document.getElementById(field);
+                values.forEach((value, i) => select.add(new Option(value, i)));
+                select.onchange = search;
+            }}
+            document.getElementById('query').oninput = search;
+            search();
+        }});
+    </script>
+</body>
+</html>
+'''
@@ -0,0 +1,108 @@
+"""
+Per-stage instrumentation behind the --profile flag of render_puzzles.py and
+validate_puzzles.py.
+
+A StageProfile wraps the functions that make up each stage (module attributes
+are swapped for timing wrappers) and records wall time, call counts and bytes.
+Bytes are the size of the str/bytes a stage returns, what its size function
+measures (the text parsed, the file written), or for streaming emitters the
+text passed to their write callable. Times are exclusive: a stage called from
+inside another (a section emitted while the page template streams) is
+subtracted from the outer one. Nothing is wrapped unless --profile is given,
+so normal runs pay nothing.
+"""
+
+import functools
+import sys
+import time
+from pathlib import Path
+
+
+class StageProfile:
+    """Wall time, call count and output bytes per named stage."""
+
+    def __init__(self):
+        self.stages = {}  # name -> [calls, seconds, bytes]
+        self.active = []  # [totals, seconds spent in nested stages] for each running stage
+
+    def counting(self, write):
+        """write, crediting each fragment's length to the innermost running stage."""
+        def counted(text):
+            self.active[-1][0][2] += len(text)
+            return write(text)
+        counted.counts_bytes = True
+        return counted
+
+    def wrap(self, func, stage: str, size=None, stream=False):
+        """func, recording each call under stage.
+
+        size(*args, **kwargs) overrides the byte count; stream=True marks an
+        emitter whose first argument is a write callable to count instead.
+        """
+        totals = self.stages.setdefault(stage, [0, 0.0, 0])
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            if stream and not getattr(args[0], 'counts_bytes', False):
+                args = (self.counting(args[0]), *args[1:])
+            frame = [totals, 0.0]
+            self.active.append(frame)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.active.pop()
+                if self.active:
+                    self.active[-1][1] += elapsed
+            totals[1] += elapsed - frame[1]
+            totals[0] += 1
+            if size is not None:
+                totals[2] += size(*args, **kwargs)
+            elif isinstance(result, (str, bytes)):
+                totals[2] += len(result)
+            return result
+        return timed
+
+    def instrument(self, owner, name: str, stage: str, size=None, stream=False):
+        """Replace owner.name (a module function or class method) with a timed wrapper."""
+        setattr(owner, name, self.wrap(getattr(owner, name), stage, size, stream))
+
+    def instrument_reads(self):
+        """Count every Path.read_text / Path.read_bytes as the 'file read' stage."""
+        self.instrument(Path, 'read_text', 'file read')
+        self.instrument(Path, 'read_bytes', 'file read')
+
+    def report(self, total: float) -> str:
+        """Summary table; total is the whole run's wall seconds."""
+        lines = [f"{'Stage':<18} {'calls':>7} {'time':>10} {'share':>7} {'per call':>10} {'bytes':>12}"]
+        for stage, (calls, seconds, size) in self.stages.items():
+            if not calls:
+                continue
+            lines.append(f"{stage:<18} {calls:>7} {seconds * 1e3:>8.1f}ms {seconds / total * 100:>6.1f}% "
+                         f"{seconds / calls * 1e6:>8.1f}us {size:>12,}")
+        lines.append(f"{'total (wall)':<18} {'':>7} {total * 1e3:>8.1f}ms")
+        return '\n'.join(lines)
+
+
+def run_profiled(func, stages: StageProfile | None, pstats_file: Path | None = None, out=sys.stdout):
+    """Call func(), then print the stage table and/or dump cProfile stats.
+
+    The summary is written even if func() exits early (e.g. sys.exit(1) on issues).
+    """
+    profiler = None
+    if pstats_file:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        return func()
+    finally:
+        total = time.perf_counter() - start
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(pstats_file)
+            print(f"\nWrote cProfile stats to {pstats_file} (python -m pstats {pstats_file})", file=out)
+        if stages:
+            print(f"\n{stages.report(total)}", file=out)
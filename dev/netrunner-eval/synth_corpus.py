@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Generate a deterministic synthetic puzzle corpus for benchmarking.
+Usage: python synth_corpus.py OUT_DIR [--count N] [--seed N]
+
+Writes synth-NNNNN-{corp,runner}-q.md / -a.md pairs in the problems/ dialect,
+using real card names from card_lookup.json. Puzzles vary in number of remotes,
+ICE depth, grip and rig size, how table-heavy the answer is and how long the
+Card Text appendix is. The same --seed always produces the same files.
+"""
+
+import json
+import random
+from pathlib import Path
+
+from card_index import load_card_lookup
+
+DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+ICONS = ['[credit]', '[Click]', '[mu]', '[link]', '[trash]', '[recurring-credit]']
+WORDS = ('the runner corp server ice breaks subroutine credits click install advance '
+         'score agenda run access trash rez strength boost net damage tag').split()
+UNKNOWN_RATE = 0.005  # Share of board cards with made-up names, so validation finds issues
+
+
+def sentence(rng: random.Random, names: list) -> str:
+    """A line of prose sprinkled with icons, bold and (if names are given) card refs."""
+    parts = []
+    for _ in range(rng.randint(8, 24)):
+        roll = rng.random()
+        if roll < 0.08 and names:
+            parts.append(f"[[{rng.choice(names)}]]")
+        elif roll < 0.14:
+            parts.append(f"{rng.randint(1, 9)}{rng.choice(ICONS)}")
+        elif roll < 0.18:
+            parts.append(f"**{rng.choice(WORDS)} {rng.choice(WORDS)}**")
+        else:
+            parts.append(rng.choice(WORDS))
+    return ' '.join(parts).capitalize() + '.'
+
+
+def paragraph(rng: random.Random, names: list) -> str:
+    return ' '.join(sentence(rng, names) for _ in range(rng.randint(1, 4)))
+
+
+def yaml_card(rng: random.Random, names: list, rezzable: bool) -> str:
+    """A board card in flow style; names are JSON-quoted, which YAML accepts."""
+    name = rng.choice(names) if rng.random() >= UNKNOWN_RATE else f"Made-up Card {rng.randint(1, 999)}"
+    quoted = json.dumps(name, ensure_ascii=False)
+    if rezzable and rng.random() < 0.6:
+        return f"{{card: {quoted}, rezzed: {'true' if rng.random() < 0.5 else 'false'}}}"
+    if rng.random() < 0.3:
+        return f"{{card: {quoted}, credits: {rng.randint(1, 6)}}}"
+    return quoted
+
+
+def board_yaml(rng: random.Random, names: list) -> str:
+    """A ```yaml board block with varying remotes, ICE depth, grip and rig."""
+    lines = ['corp:', f'  credits: {rng.randint(0, 15)}', f'  points: {rng.randint(0, 6)}',
+             f'  clicks: {rng.randint(0, 3)}']
+    servers = ['HQ', 'R&D', 'Archives'] + [f'Server {i}' for i in range(1, rng.randint(1, 7))]
+    for server in servers:
+        depth = rng.choice([0, 1, 1, 2, 2, 3, 4, 6])
+        lines.append(f'  {server}:')
+        if depth:
+            lines.append('    ice:')
+            lines.extend(f'      - {yaml_card(rng, names, True)}' for _ in range(depth))
+        if server.startswith('Server'):
+            roots = [yaml_card(rng, names, True) for _ in range(rng.choice([0, 1, 1, 2]))]
+            if not roots:
+                lines.append('    root: null')
+            elif len(roots) == 1:
+                lines.append(f'    root: {roots[0]}')
+            else:
+                lines.append(f'    root: [{", ".join(roots)}]')
+
+    lines += ['', 'runner:', f'  credits: {rng.randint(0, 20)}', f'  points: {rng.randint(0, 6)}',
+              f'  clicks: {rng.randint(0, 4)}']
+    if rng.random() < 0.3:
+        lines.append(f'  grip: {rng.randint(0, 8)}')
+    else:
+        lines.append('  grip:')
+        lines.extend(f'    - {yaml_card(rng, names, False)}' for _ in range(rng.randint(0, 10)))
+    rig_size = rng.randint(0, 12)
+    lines.append('  rig:' if rig_size else '  rig: []')
+    lines.extend(f'    - {yaml_card(rng, names, False)}' for _ in range(rig_size))
+    return '```yaml\n' + '\n'.join(lines) + '\n```'
+
+
+def card_text(rng: random.Random, names: list) -> str:
+    """A Card Text (Auto-Generated) appendix body."""
+    entries = []
+    for name in sorted(rng.sample(names, rng.randint(0, 14))):
+        subs = '\n'.join(f"↳ {sentence(rng, [])}" for _ in range(rng.randint(0, 3)))
+        entries.append(f"**{name}** - {rng.choice(WORDS).capitalize()} (Cost {rng.randint(0, 6)})\n"
+                       f"{sentence(rng, [])}" + (f"\n{subs}" if subs else ''))
+    return '\n\n'.join(entries)
+
+
+def table(rng: random.Random, names: list) -> str:
+    """A run table mixing card refs, icons and bold cells."""
+    cols = rng.randint(3, 6)
+    rows = [f"| {' | '.join(rng.choice(WORDS).capitalize() for _ in range(cols))} |",
+            '|' + '|'.join('---' for _ in range(cols)) + '|']
+    for _ in range(rng.randint(2, 12)):
+        cells = []
+        for _ in range(cols):
+            roll = rng.random()
+            if roll < 0.2:
+                cells.append(f"[[{rng.choice(names)}]]")
+            elif roll < 0.4:
+                cells.append(f"{rng.randint(0, 9)}{rng.choice(ICONS)}")
+            elif roll < 0.5:
+                cells.append(f"**{rng.randint(0, 9)} credits**")
+            else:
+                cells.append(' '.join(rng.choices(WORDS, k=rng.randint(1, 4))))
+        rows.append(f"| {' | '.join(cells)} |")
+    return '\n'.join(rows)
+
+
+def puzzle_pair(rng: random.Random, names: list, name: str) -> tuple[str, str]:
+    """Markdown for one (question, answer) pair."""
+    difficulty = rng.choice(DIFFICULTIES)
+    q_parts = [
+        f"# Problem: {name} [{difficulty}]",
+        f"## Context\n\n{paragraph(rng, names)}",
+        f"## Board State\n\n{board_yaml(rng, names)}" +
+        (f"\n\n{paragraph(rng, names)}" if rng.random() < 0.2 else ''),
+    ]
+    appendix = card_text(rng, names)
+    if appendix:
+        q_parts.append(f"## Card Text (Auto-Generated)\n\n{appendix}")
+    questions = '\n\n'.join(f"**Q{i}:** {sentence(rng, names)}" for i in range(1, rng.randint(2, 5)))
+    q_parts.append(f"## Questions\n\n{questions}")
+
+    a_parts = [f"# Answer: {name}"]
+    for i in range(rng.choice([1, 2, 3, 5, 8])):
+        body = [paragraph(rng, names)]
+        for _ in range(rng.choice([0, 1, 1, 2, 4])):
+            body += [table(rng, names), paragraph(rng, names)]
+        if rng.random() < 0.2:
+            body.append(f"```\n{sentence(rng, [])}\n{sentence(rng, [])}\n```")
+        a_parts.append(f"## Part {i + 1}\n\n" + '\n\n'.join(body) + '\n\n---')
+    return '\n\n'.join(q_parts) + '\n', '\n\n'.join(a_parts) + '\n'
+
+
+def generate_corpus(out_dir: Path, count: int, seed: int = 0) -> list:
+    """Write count puzzle pairs into out_dir, return the question files."""
+    rng = random.Random(seed)
+    names = sorted(load_card_lookup())
+    out_dir.mkdir(parents=True, exist_ok=True)
+    q_files = []
+    for i in range(count):
+        name = f"synth-{i:05d}-{rng.choice(['corp', 'runner'])}"
+        question, answer = puzzle_pair(rng, names, name)
+        (out_dir / f"{name}-q.md").write_text(question)
+        (out_dir / f"{name}-a.md").write_text(answer)
+        q_files.append(out_dir / f"{name}-q.md")
+    return q_files
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate a synthetic puzzle corpus.')
+    parser.add_argument('out_dir', type=Path, help='Directory to write puzzle files into')
+    parser.add_argument('--count', type=int, default=100, help='Puzzle pairs to generate (default: 100)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    q_files = generate_corpus(args.out_dir, args.count, args.seed)
+    print(f"Wrote {len(q_files)} puzzle pairs to {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
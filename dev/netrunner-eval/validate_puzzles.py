@@ -1,109 +1,78 @@
 #!/usr/bin/env python3
 """
 Validate Netrunner puzzle source files for common issues.
-Usage: python validate_puzzles.py [problems_dir]
+Usage: python validate_puzzles.py [--format text|json|jsonl|sarif] [--cached] [--jobs N] [--no-cache]
+                                  [--profile] [--pstats FILE] [problems_dir]
 """
 
+import hashlib
 import json
+import os
 import re
 import sys
+import time
+from dataclasses import asdict
+from functools import lru_cache
 from pathlib import Path
 
-import yaml
+from board_model import Issue, parse_board
+from board_schema import check_board
+import card_deps
+from card_index import CardNameMatcher, load_card_lookup, load_card_matcher
+from common import file_digest, write_atomic
+import puzzle_cache
+from puzzle_cache import CACHE_DIR, YAML_TIMEOUT, load_puzzle
+from stage_profile import StageProfile, run_profiled
 
 # What we check for
 QUESTION_SECTIONS = ['Question', 'Questions']  # Must have one of these
 CONTEXT_SECTIONS = ['Context', 'Situation']  # Must have one of these
 BOARD_SECTION_PREFIXES = ['Board', 'State', 'Hand']  # Must have one starting with these
+PLACEHOLDER_CARDS = ('Unknown', 'Agenda', 'Asset', 'Upgrade')  # Stand-ins for unidentified cards
 
 
-def load_card_lookup(path: Path) -> set:
-    """Load valid card names."""
-    with open(path) as f:
-        return set(json.load(f).keys())
+SCRIPT_DIR = Path(__file__).parent
+RESULTS_FILE = SCRIPT_DIR / ".validate-results.json"
 
+# Sources whose edits change what validate_puzzle() reports
+VALIDATOR_SOURCES = [Path(__file__), SCRIPT_DIR / "board_model.py", SCRIPT_DIR / "board_schema.py",
+                     SCRIPT_DIR / "board_yaml.py", SCRIPT_DIR / "card_index.py"]
 
-def parse_sections(content: str) -> dict:
-    """Parse markdown into sections."""
-    sections = {}
-    current_section = None
-    current_content = []
-
-    for line in content.split('\n'):
-        if line.startswith('## '):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = line[3:].strip()
-            current_content = []
-        elif line.startswith('# '):
-            sections['_title'] = line[2:].strip()
-        else:
-            current_content.append(line)
-
-    if current_section:
-        sections[current_section] = '\n'.join(current_content).strip()
-
-    return sections
-
-
-def extract_yaml(content: str) -> tuple[dict | None, str | None]:
-    """Extract and parse YAML block, return (data, error)."""
-    match = re.search(r'```yaml\s*\n(.*?)```', content, re.DOTALL)
-    if not match:
-        return None, "No YAML block found"
-    try:
-        return yaml.safe_load(match.group(1)), None
-    except yaml.YAMLError as e:
-        return None, f"YAML parse error: {e}"
 
+@lru_cache(maxsize=None)
+def load_card_names(path: Path) -> frozenset:
+    """Load valid card names, or none if the lookup file is missing."""
+    if not path.exists():
+        return frozenset()
+    return frozenset(load_card_lookup(path))
 
-def validate_card_list(items: list, field_name: str, valid_cards: set) -> list:
-    """Validate a list of cards, return issues."""
-    issues = []
-    if not isinstance(items, list):
-        issues.append(f"{field_name}: Expected list, got {type(items).__name__}")
-        return issues
-    
-    for i, item in enumerate(items):
-        if isinstance(item, str):
-            card_name = item
-        elif isinstance(item, dict):
-            card_name = item.get('card', '')
-        else:
-            issues.append(f"{field_name}[{i}]: Invalid item type {type(item).__name__}")
-            continue
-        
-        if card_name and card_name not in valid_cards:
-            # Special cases that are OK
-            if card_name in ('Unknown', 'Agenda', 'Asset', 'Upgrade'):
-                continue
-            issues.append(f"{field_name}[{i}]: Unknown card '{card_name}'")
-    
-    return issues
 
+def validate_puzzle(q_file: Path, valid_cards: set, cache_dir: Path | None = CACHE_DIR,
+                    timings: dict | None = None, matcher: CardNameMatcher | None = None) -> list[Issue]:
+    """Validate a single puzzle file, return list of issues.
 
-def validate_puzzle(q_file: Path, valid_cards: set) -> list:
-    """Validate a single puzzle file, return list of issues."""
+    If timings is given it receives per-stage seconds (see load_puzzle(),
+    plus 'cards' for the board and card-name checks). With a matcher,
+    unknown cards come with "did you mean" suggestions.
+    """
     issues = []
-    content = q_file.read_text()
-    sections = parse_sections(content)
+    puzzle = load_puzzle(q_file, cache_dir, timings)
+    sections = puzzle['sections']
     
     # Check title has difficulty
     title = sections.get('_title', '')
     if not re.search(r'\[(Easy|Medium|Hard)\]', title):
-        issues.append("Missing difficulty tag [Easy|Medium|Hard] in title")
+        issues.append(Issue('missing-difficulty', "Missing difficulty tag [Easy|Medium|Hard] in title"))
     
     # Check required sections
     has_context = any(s in sections for s in CONTEXT_SECTIONS)
     if not has_context:
-        issues.append(f"Missing context section (need one of: {CONTEXT_SECTIONS})")
+        issues.append(Issue('missing-context', f"Missing context section (need one of: {CONTEXT_SECTIONS})"))
     
-    has_question = any(s in sections or any(s.startswith(q) for q in QUESTION_SECTIONS) 
-                       for s in sections for q in QUESTION_SECTIONS)
     has_question = any(s in sections for s in QUESTION_SECTIONS) or \
                    any(s.startswith('Question') for s in sections)
     if not has_question:
-        issues.append(f"Missing question section (need one of: {QUESTION_SECTIONS})")
+        issues.append(Issue('missing-question', f"Missing question section (need one of: {QUESTION_SECTIONS})"))
     
     # Check for Board State, State, or Hand section (prefix match)
     has_board_or_hand = any(
@@ -112,7 +81,7 @@ def validate_puzzle(q_file: Path, valid_cards: set) -> list:
         for prefix in BOARD_SECTION_PREFIXES
     )
     if not has_board_or_hand:
-        issues.append("Missing Board State / State / Hand section")
+        issues.append(Issue('missing-board', "Missing Board State / State / Hand section"))
         return issues
     
     # Only validate YAML if there's a Board State section
@@ -120,118 +89,297 @@ def validate_puzzle(q_file: Path, valid_cards: set) -> list:
         return issues  # Hand-based puzzles don't need YAML validation
     
     # Parse and validate YAML
-    board_content = sections.get('Board State', '')
-    board_data, yaml_error = extract_yaml(board_content)
+    board_data, yaml_error = puzzle['yaml'].get('Board State', (None, "No YAML block found"))
     
     if yaml_error:
-        issues.append(yaml_error)
+        if yaml_error.startswith(YAML_TIMEOUT):
+            code = 'yaml-timeout'
+        else:
+            code = 'yaml-syntax' if yaml_error.startswith('YAML parse error') else 'yaml-missing'
+        issues.append(Issue(code, yaml_error))
         return issues
     
     if not board_data:
-        issues.append("Empty YAML block")
+        issues.append(Issue('yaml-empty', "Empty YAML block"))
         return issues
     
-    # Validate corp section
-    corp = board_data.get('corp', {})
-    if not corp:
-        issues.append("Missing 'corp' in YAML")
-    else:
-        # Check ICE in servers
-        for server_name in ['HQ', 'R&D', 'Archives']:
-            if server_name in corp:
-                server = corp[server_name]
-                if isinstance(server, dict) and 'ice' in server:
-                    issues.extend(validate_card_list(
-                        server['ice'], f"corp.{server_name}.ice", valid_cards))
-        
-        # Check remotes
-        for key, val in corp.items():
-            if key.startswith('Server') or key.startswith('Remote'):
-                if isinstance(val, dict):
-                    if 'ice' in val:
-                        issues.extend(validate_card_list(
-                            val['ice'], f"corp.{key}.ice", valid_cards))
-                    if 'root' in val:
-                        root = val['root']
-                        if isinstance(root, list):
-                            issues.extend(validate_card_list(
-                                root, f"corp.{key}.root", valid_cards))
-                        elif isinstance(root, dict) and 'card' in root:
-                            if root['card'] not in valid_cards and root['card'] not in ('Unknown', 'Agenda'):
-                                issues.append(f"corp.{key}.root: Unknown card '{root['card']}'")
-    
-    # Validate runner section
-    runner = board_data.get('runner', {})
-    if not runner:
-        issues.append("Missing 'runner' in YAML")
-    else:
-        # Check grip
-        grip = runner.get('grip')
-        if grip is not None:
-            if isinstance(grip, int):
-                issues.append(f"runner.grip: Is a number ({grip}), should be a list of card names")
-            elif isinstance(grip, list):
-                issues.extend(validate_card_list(grip, "runner.grip", valid_cards))
-        
-        # Check rig
-        rig = runner.get('rig')
-        if rig is not None:
-            if isinstance(rig, int):
-                issues.append(f"runner.rig: Is a number ({rig}), should be a list of card names")
-            elif isinstance(rig, list):
-                issues.extend(validate_card_list(rig, "runner.rig", valid_cards))
+    # Shape problems come from the board schema, then check every card name
+    start = time.perf_counter()
+    issues.extend(check_board(board_data))
+    board = parse_board(board_data)
+    for card in board.cards():
+        if card.name and card.name not in valid_cards and card.name not in PLACEHOLDER_CARDS:
+            issues.append(Issue('unknown-card', unknown_card_message(card.name, matcher), card.path))
+    if timings is not None:
+        timings['cards'] = time.perf_counter() - start
     
     return issues
 
 
+def unknown_card_message(name, matcher: CardNameMatcher | None) -> str:
+    # Only text is matched; board_schema reports other values as expected-text
+    suggestions = matcher.suggest(name) if matcher and isinstance(name, str) else []
+    if not suggestions:
+        return f"Unknown card '{name}'"
+    quoted = ' or '.join(f"'{suggestion}'" for suggestion in suggestions)
+    return f"Unknown card '{name}' (did you mean {quoted}?)"
+
+
+def validator_version() -> str:
+    """Short hash of the validator's own sources, so rule changes invalidate cached results."""
+    digest = hashlib.sha256()
+    for source in VALIDATOR_SOURCES:
+        digest.update(source.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def load_results() -> dict:
+    """Load cached per-file results, or an empty set if missing/corrupt."""
+    try:
+        results = json.loads(RESULTS_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+    return results if isinstance(results, dict) else {}
+
+
+def save_results(results: dict):
+    """Write cached per-file results via a temp file + rename."""
+    write_atomic(RESULTS_FILE, json.dumps(results, indent=2, sort_keys=True))
+
+
+def check_file(q_file: Path, card_lookup_file: Path, cache_dir: Path | None) -> dict:
+    """validate_puzzle() for worker processes: card names are loaded once per worker.
+
+    Returns the JSON-ready result: issues as dicts and stage timings in ms.
+    """
+    timings = {}
+    matcher = load_card_matcher(card_lookup_file) if card_lookup_file.exists() else None
+    issues = validate_puzzle(q_file, load_card_names(card_lookup_file), cache_dir, timings, matcher)
+    return {
+        'issues': [asdict(issue) for issue in issues],
+        'timings': {stage: round(seconds * 1e3, 3) for stage, seconds in timings.items()},
+    }
+
+
+def issue_record(q_file: Path, issue: dict) -> dict:
+    """An issue as emitted by --format json/jsonl, with the file it was found in."""
+    return {'file': str(q_file), **issue}
+
+
+def sarif_report(q_files: list, results: dict) -> dict:
+    """Build a SARIF 2.1.0 log; YAML paths become logical locations."""
+    sarif_results = []
+    rules = {}
+    artifacts = []
+    for q_file in q_files:
+        result = results[q_file]
+        uri = q_file.as_posix()
+        artifacts.append({
+            'location': {'uri': uri},
+            'properties': {'timings': result['timings'], 'cached': result['cached']},
+        })
+        for issue in result['issues']:
+            rules.setdefault(issue['code'], {'id': issue['code']})
+            location = {'physicalLocation': {'artifactLocation': {'uri': uri}}}
+            if issue['path']:
+                location['logicalLocations'] = [{'fullyQualifiedName': issue['path']}]
+            sarif_results.append({
+                'ruleId': issue['code'],
+                'level': issue['severity'],
+                'message': {'text': issue['message']},
+                'locations': [location],
+            })
+    return {
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'version': '2.1.0',
+        'runs': [{
+            'tool': {'driver': {'name': 'validate_puzzles', 'rules': [rules[code] for code in sorted(rules)]}},
+            'artifacts': artifacts,
+            'results': sarif_results,
+        }],
+    }
+
+
+def instrument_stages() -> StageProfile:
+    """Wrap the functions behind each validation stage for --profile."""
+    stages = StageProfile()
+    stages.instrument_reads()
+    stages.instrument(puzzle_cache, 'parse_sections', 'section parse', size=len)
+    stages.instrument(puzzle_cache, 'extract_yaml', 'YAML parse', size=len)
+    stages.instrument(sys.modules[__name__], 'check_board', 'board schema')
+    stages.instrument(sys.modules[__name__], 'parse_board', 'board model')
+    stages.instrument(sys.modules[__name__], 'save_results', 'write')
+    return stages
+
+
 def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Validate Netrunner puzzle source files for common issues.')
+    parser.add_argument('problems_dir', nargs='?', type=Path, default=Path(__file__).parent / "problems",
+                        help='Directory of *-q.md puzzle files (default: problems/ next to this script)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Parse puzzles without the shared parsed-puzzle cache ({CACHE_DIR.name}/)')
+    parser.add_argument('--cached', action='store_true',
+                        help='Only revalidate files whose content, card_lookup.json or validator changed '
+                             f'since the last run (results kept in {RESULTS_FILE.name})')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Validate puzzles across N worker processes (0 = one per CPU)')
+    parser.add_argument('--format', choices=['text', 'json', 'jsonl', 'sarif'], default='text',
+                        help='Report format; machine formats go to stdout with per-file stage timings '
+                             'and progress moves to stderr')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print wall time, calls and bytes per stage (read, section parse, YAML parse, board model)')
+    parser.add_argument('--pstats', type=Path, metavar='FILE',
+                        help='Dump cProfile stats for the run to FILE')
+    args = parser.parse_args()
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    if not (args.profile or args.pstats):
+        validate_all(args)
+        return
+
+    # Workers' time would be invisible to the profilers, so validate in-process
+    log_file = sys.stdout if args.format == 'text' else sys.stderr
+    if args.jobs > 1:
+        print("Profiling: ignoring --jobs, validating in-process", file=log_file)
+        args.jobs = 1
+    run_profiled(lambda: validate_all(args), instrument_stages() if args.profile else None,
+                 args.pstats, out=log_file)
+
+
+def validate_all(args):
+    """Validate every puzzle in args.problems_dir and report, as configured by main()'s flags."""
+
+    # Text reports go to stdout; for machine formats stdout carries only the report
+    log_file = sys.stdout if args.format == 'text' else sys.stderr
+    def log(*parts):
+        print(*parts, file=log_file)
+
     # Determine paths
-    if len(sys.argv) > 1:
-        problems_dir = Path(sys.argv[1])
-    else:
-        problems_dir = Path(__file__).parent / "problems"
+    problems_dir = args.problems_dir
+    cache_dir = None if args.no_cache else CACHE_DIR
     
     card_lookup_file = problems_dir.parent / "card_lookup.json"
     
     if not problems_dir.exists():
-        print(f"Error: Problems directory not found: {problems_dir}")
+        log(f"Error: Problems directory not found: {problems_dir}")
         sys.exit(1)
     
     if not card_lookup_file.exists():
-        print(f"Warning: Card lookup not found: {card_lookup_file}")
-        print("Card name validation disabled.")
-        valid_cards = set()
+        log(f"Warning: Card lookup not found: {card_lookup_file}")
+        log("Card name validation disabled.")
     else:
-        valid_cards = load_card_lookup(card_lookup_file)
-        print(f"Loaded {len(valid_cards)} valid card names")
+        log(f"Loaded {len(load_card_names(card_lookup_file))} valid card names")
     
     # Find and validate all puzzle files
     q_files = sorted(problems_dir.glob('*-q.md'))
-    print(f"Found {len(q_files)} puzzle files\n")
-    
-    total_issues = 0
-    files_with_issues = 0
+    log(f"Found {len(q_files)} puzzle files\n")
     
+    # Reuse cached results for files whose inputs are unchanged
+    old_results = load_results() if args.cached else {}
+    new_results = {}
+    stale = []
+    if args.cached:
+        # A file's result depends on the lookup entries of the cards it uses, not the whole lookup
+        deps = card_deps.load_deps(q_files, cache_dir)
+        lookup = load_card_lookup(card_lookup_file) if card_lookup_file.exists() else {}
+        names_digest = card_deps.lookup_names_digest(lookup)
+        version = validator_version()
     for q_file in q_files:
-        issues = validate_puzzle(q_file, valid_cards)
-        
-        if issues:
-            files_with_issues += 1
-            total_issues += len(issues)
-            print(f"❌ {q_file.name}")
-            for issue in issues:
-                print(f"   • {issue}")
-            print()
+        key = str(q_file.resolve())
+        if args.cached:
+            cards = [name for name in deps[key] if name not in PLACEHOLDER_CARDS]
+            cards_digest = card_deps.cards_digest(cards, lookup, names_digest)
+            inputs = {'q': file_digest(q_file), 'cards': cards_digest, 'validator': version}
+            cached = old_results.get(key)
+            if cached and cached.get('inputs') == inputs:
+                new_results[key] = cached
+                continue
         else:
-            print(f"✓ {q_file.name}")
+            inputs = None
+        stale.append((q_file, key, inputs))
+
+    stale_files = [q_file for q_file, _, _ in stale]
+    card_lookup_files = [card_lookup_file] * len(stale_files)
+    cache_dirs = [cache_dir] * len(stale_files)
+    if args.jobs > 1 and len(stale_files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            checked = list(pool.map(check_file, stale_files, card_lookup_files, cache_dirs,
+                                    chunksize=max(1, len(stale_files) // (args.jobs * 4))))
+    else:
+        checked = list(map(check_file, stale_files, card_lookup_files, cache_dirs))
+
+    for (_, key, inputs), result in zip(stale, checked):
+        # A YAML block that ran out of time says nothing about the file; check it again next run
+        if any(issue['code'] == 'yaml-timeout' for issue in result['issues']):
+            inputs = None
+        new_results[key] = {'inputs': inputs, **result}
+
+    stale_keys = {key for _, key, _ in stale}
+    results = {}
+    for q_file in q_files:
+        key = str(q_file.resolve())
+        results[q_file] = {**new_results[key], 'cached': key not in stale_keys}
+    # Warnings are reported but do not fail the run
+    errors = {q_file: sum(issue['severity'] == 'error' for issue in result['issues'])
+              for q_file, result in results.items()}
+    files_with_issues = sum(1 for count in errors.values() if count)
+    total_issues = sum(errors.values())
+    total_warnings = sum(len(result['issues']) for result in results.values()) - total_issues
+
+    if args.format == 'text':
+        for q_file in q_files:
+            issues = results[q_file]['issues']
+            if issues:
+                print(f"❌ {q_file.name}" if errors[q_file] else f"⚠ {q_file.name}")
+                for issue in issues:
+                    label = '' if issue['severity'] == 'error' else f"{issue['severity']}: "
+                    print(f"   • {label}{Issue(**issue)}")
+                print()
+            else:
+                print(f"✓ {q_file.name}")
+    elif args.format == 'jsonl':
+        for q_file in q_files:
+            result = results[q_file]
+            print(json.dumps({
+                'file': str(q_file),
+                'issues': [issue_record(q_file, issue) for issue in result['issues']],
+                'timings': result['timings'],
+                'cached': result['cached'],
+            }))
+    elif args.format == 'json':
+        print(json.dumps({
+            'files': [{
+                'file': str(q_file),
+                'issues': [issue_record(q_file, issue) for issue in results[q_file]['issues']],
+                'timings': results[q_file]['timings'],
+                'cached': results[q_file]['cached'],
+            } for q_file in q_files],
+            'summary': {'files': len(q_files), 'files_with_issues': files_with_issues, 'issues': total_issues,
+                        'warnings': total_warnings},
+        }, indent=2))
+    else:
+        print(json.dumps(sarif_report(q_files, results), indent=2))
     
     # Summary
-    print(f"\n{'='*50}")
-    print(f"Total: {len(q_files)} files, {files_with_issues} with issues, {total_issues} total issues")
+    log(f"\n{'='*50}")
+    log(f"Total: {len(q_files)} files, {files_with_issues} with issues, {total_issues} total issues"
+        + (f", {total_warnings} warnings" if total_warnings else ""))
+
+    if args.cached:
+        # Keep entries for other problem directories; drop deleted files from this one
+        saved = {key: value for key, value in old_results.items()
+                 if not Path(key).is_relative_to(problems_dir.resolve())}
+        saved.update(new_results)
+        save_results(saved)
+        log(f"Revalidated {len(stale)} of {len(q_files)} files ({len(q_files) - len(stale)} cached)")
+    pruned = 0 if cache_dir is None else puzzle_cache.prune_cache(cache_dir)
+    if pruned:
+        log(f"Pruned {pruned} stale entries from {cache_dir.name}/")
     
     if total_issues > 0:
         sys.exit(1)
 
-
 if __name__ == '__main__':
     main()